@@ -0,0 +1,77 @@
+#! /usr/bin/env python3
+#
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+#
+# Measures how regex scans that cannot be narrowed by an index scale with the
+# number of worker processes used by `find --jobs`
+
+import argparse
+import os
+import random
+import string
+import time
+
+from spdx3query.parallel import search_column
+
+DEFAULT_PATTERN = r"^[a-z]+-[0-9]+\.[0-9]*[13579]:.*(alpha|beta)$"
+
+
+def generate_column(count, seed):
+    r = random.Random(seed)
+    column = []
+    for _ in range(count):
+        name = "".join(r.choices(string.ascii_lowercase, k=r.randint(4, 12)))
+        version = f"{r.randint(0, 20)}.{r.randint(0, 200)}"
+        suffix = r.choice(("", "alpha", "beta", "rc1", "git"))
+        column.append(f"{name}-{version}:{suffix}")
+    return column
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel regex scans")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=2000000,
+        help="Number of generated values. Default is %(default)s",
+    )
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Maximum number of jobs. Default is %(default)s",
+    )
+    parser.add_argument(
+        "--pattern",
+        default=DEFAULT_PATTERN,
+        help="Regex pattern to scan for. Default is %(default)s",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    start = time.time()
+    column = generate_column(args.rows, args.seed)
+    print(f"Generated {len(column)} values in {time.time() - start:.2f}s")
+
+    baseline = None
+    expected = None
+    print(f"{'jobs':>4} {'time':>8} {'speedup':>8} {'matches':>8}")
+    for jobs in range(1, args.max_jobs + 1):
+        start = time.time()
+        result = search_column(column, args.pattern, jobs=jobs)
+        elapsed = time.time() - start
+
+        if baseline is None:
+            baseline = elapsed
+            expected = result
+        assert result == expected, "Parallel results do not match"
+
+        print(
+            f"{jobs:>4} {elapsed:>7.2f}s {baseline / elapsed:>7.2f}x {len(result):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import sys
+from collections import OrderedDict
+
+CONTAINERS = (list, tuple, set, frozenset)
+
+
+# Estimates the memory used by a cached result. Only the containers are
+# counted, since the objects in them are owned by the Document
+def estimate_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, CONTAINERS):
+        for v in value:
+            if isinstance(v, CONTAINERS):
+                size += estimate_size(v)
+    return size
+
+
+def freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+
+# Returns a hashable key for the parsed arguments of a command, ignoring
+# arguments that only affect how the result is displayed
+def get_cache_key(name, args, ignore=()):
+    return (name,) + tuple(
+        sorted(
+            (k, freeze(v))
+            for k, v in vars(args).items()
+            if k != "func" and k not in ignore
+        )
+    )
+
+
+def key_contains(key, value):
+    if key == value:
+        return True
+    if isinstance(key, (tuple, frozenset)):
+        return any(key_contains(k, value) for k in key)
+    return False
+
+
+class ResultCache(object):
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.size = 0
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def clear(self):
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, key, generation, compute):
+        # Any change to the Document invalidates all cached results
+        if generation != self.generation:
+            self.invalidations += len(self.entries)
+            self.clear()
+            self.generation = generation
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        value = compute()
+
+        # Results that are generated lazily are collected so they can be
+        # reused
+        if not isinstance(value, CONTAINERS):
+            value = list(value)
+
+        size = estimate_size(value)
+        if size <= self.budget:
+            self.entries[key] = (value, size)
+            self.size += size
+            while self.size > self.budget:
+                _, (_, s) = self.entries.popitem(last=False)
+                self.size -= s
+                self.evictions += 1
+
+        return value
+
+    def print_stats(self):
+        print(f"Entries:       {len(self.entries)}")
+        print(f"Size:          {self.size} of {self.budget} bytes")
+        print(f"Hits:          {self.hits}")
+        print(f"Misses:        {self.misses}")
+        print(f"Evictions:     {self.evictions}")
+        print(f"Invalidations: {self.invalidations}")
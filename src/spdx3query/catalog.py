@@ -0,0 +1,157 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import sys
+from pathlib import Path
+
+from .fingerprint import get_graph, get_item_id
+from .name import get_handle
+from . import spdx3
+
+MANIFEST_NAME = ".spdx3query-catalog.json"
+MANIFEST_VERSION = 1
+
+
+# Scans a SPDX 3 JSON-LD file for the IDs and namespaces it defines without
+# constructing any objects
+def index_file(path):
+    ids = []
+    namespaces = []
+
+    with path.open("rb") as f:
+        data = json.load(f)
+
+    for item in get_graph(data):
+        if not isinstance(item, dict):
+            continue
+
+        _id = get_item_id(item)
+        if _id is not None and not spdx3.is_blank_node(_id):
+            ids.append(_id)
+
+        if item.get("type", item.get("@type")) in (
+            spdx3.SpdxDocument._OBJ_TYPE,
+            spdx3.SpdxDocument._OBJ_COMPACT_TYPE,
+        ):
+            for m in item.get("namespaceMap", []):
+                if isinstance(m, dict) and isinstance(m.get("namespace"), str):
+                    namespaces.append(m["namespace"])
+
+    return ids, namespaces
+
+
+class Catalog(object):
+    def __init__(self, path):
+        self.path = Path(path)
+        self.manifest_path = self.path / MANIFEST_NAME
+        self.files = {}
+        self.id_map = {}
+        self.namespaces = []
+        self.handle_map = {}
+
+    def read_manifest(self):
+        try:
+            with self.manifest_path.open("r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+
+        return data.get("files", {})
+
+    def write_manifest(self):
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": self.files,
+        }
+        try:
+            with self.manifest_path.open("w") as f:
+                json.dump(data, f, sort_keys=True)
+        except OSError as e:
+            print(f"Warning: Unable to write catalog manifest: {e}", file=sys.stderr)
+
+    def update(self):
+        old_files = self.read_manifest()
+        self.files = {}
+        changed = False
+
+        for p in sorted(self.path.rglob("*.json")):
+            if p == self.manifest_path or not p.is_file():
+                continue
+
+            rel = p.relative_to(self.path).as_posix()
+            st = p.stat()
+            entry = old_files.get(rel)
+            if (
+                entry is not None
+                and entry["mtime"] == st.st_mtime_ns
+                and entry["size"] == st.st_size
+            ):
+                self.files[rel] = entry
+                continue
+
+            try:
+                ids, namespaces = index_file(p)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Unable to index '{p}': {e}", file=sys.stderr)
+                ids = []
+                namespaces = []
+
+            self.files[rel] = {
+                "mtime": st.st_mtime_ns,
+                "size": st.st_size,
+                "ids": ids,
+                "namespaces": namespaces,
+            }
+            changed = True
+
+        if changed or set(old_files.keys()) != set(self.files.keys()):
+            self.write_manifest()
+
+        self.id_map = {}
+        namespaces = {}
+        for rel, entry in self.files.items():
+            for _id in entry["ids"]:
+                self.id_map.setdefault(_id, rel)
+            for ns in entry["namespaces"]:
+                namespaces.setdefault(ns, rel)
+
+        # Longest namespace first so that the most specific one matches
+        self.namespaces = sorted(
+            namespaces.items(), key=lambda x: len(x[0]), reverse=True
+        )
+        self.handle_map = {}
+
+    def count(self):
+        return len(self.id_map)
+
+    def find(self, _id):
+        rel = self.id_map.get(_id)
+        if rel is None:
+            for ns, ns_rel in self.namespaces:
+                if _id.startswith(ns):
+                    rel = ns_rel
+                    break
+            else:
+                return None
+
+        return (self.path / rel).resolve()
+
+    def find_files(self, ids):
+        paths = set()
+        for _id in ids:
+            p = self.find(_id)
+            if p is not None:
+                paths.add(p)
+        return paths
+
+    def find_handle(self, handle, handle_terms):
+        if handle_terms not in self.handle_map:
+            self.handle_map[handle_terms] = {
+                get_handle(_id, handle_terms): _id for _id in self.id_map.keys()
+            }
+        return self.handle_map[handle_terms].get(handle)
@@ -0,0 +1,176 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import csv
+import json
+import struct
+import sys
+from array import array
+
+# Tables are written in blocks of at most this many rows, so only one block of
+# each table needs to be kept in memory
+BLOCK_ROWS = 64 * 1024
+
+# The kinds of values stored in a column. In the columnar format, each kind is
+# stored as a little-endian array of the type code. Strings are stored as an
+# index into a dictionary of the unique strings in the table. Missing values
+# are stored as NULL_VALUES
+COLUMN_KINDS = {
+    "int": "q",
+    "ref": "i",
+    "float": "d",
+    "bool": "b",
+    "str": "i",
+}
+NULL_VALUES = {
+    "int": -(2**63),
+    "ref": -1,
+    "float": float("nan"),
+    "bool": -1,
+    "str": -1,
+}
+
+MAGIC = b"SPDX3COL"
+VERSION = 1
+LENGTH = struct.Struct("<I")
+
+FORMATS = ("csv", "columns")
+EXTENSIONS = {
+    "csv": ".csv",
+    "columns": ".cols",
+}
+
+
+class CSVTableWriter(object):
+    def __init__(self, path, name, columns):
+        self.f = path.open("w", newline="")
+        self.csv = csv.writer(self.f, lineterminator="\n")
+        self.csv.writerow(name for name, _ in columns)
+        self.rows = 0
+
+    def add_row(self, row):
+        self.csv.writerow(("" if v is None else v) for v in row)
+        self.rows += 1
+
+    def close(self):
+        self.f.close()
+
+
+# Writes a table in a simple columnar format. The file starts with MAGIC, the
+# format version and a JSON schema, followed by blocks of rows. Each block
+# has a JSON header with the number of rows and the strings added to the
+# dictionary, followed by the data of each column
+class ColumnTableWriter(object):
+    def __init__(self, path, name, columns):
+        self.f = path.open("wb")
+        self.columns = columns
+        self.strings = {}
+        self.new_strings = []
+        self.rows = 0
+        self.clear()
+
+        schema = json.dumps({"table": name, "columns": columns}).encode("utf-8")
+        self.f.write(MAGIC)
+        self.f.write(LENGTH.pack(VERSION))
+        self.f.write(LENGTH.pack(len(schema)))
+        self.f.write(schema)
+
+    def clear(self):
+        self.data = [array(COLUMN_KINDS[kind]) for _, kind in self.columns]
+        self.block_rows = 0
+
+    def intern(self, s):
+        idx = self.strings.get(s)
+        if idx is None:
+            idx = len(self.strings)
+            self.strings[s] = idx
+            self.new_strings.append(s)
+        return idx
+
+    def add_row(self, row):
+        for data, (_, kind), v in zip(self.data, self.columns, row):
+            if v is None:
+                data.append(NULL_VALUES[kind])
+            elif kind == "str":
+                data.append(self.intern(v))
+            else:
+                data.append(v)
+
+        self.rows += 1
+        self.block_rows += 1
+        if self.block_rows >= BLOCK_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.block_rows:
+            return
+
+        header = json.dumps(
+            {"rows": self.block_rows, "strings": self.new_strings}
+        ).encode("utf-8")
+        self.f.write(LENGTH.pack(len(header)))
+        self.f.write(header)
+        for data in self.data:
+            if sys.byteorder != "little":
+                data.byteswap()
+            data.tofile(self.f)
+
+        self.new_strings = []
+        self.clear()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+
+TABLE_WRITERS = {
+    "csv": CSVTableWriter,
+    "columns": ColumnTableWriter,
+}
+
+
+# Reads a table written in the columnar format, and returns the table name
+# and a dictionary of column name to a list of values (with None for missing
+# values). This is suitable for passing to e.g. pandas.DataFrame()
+def read_table(path):
+    with path.open("rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a columnar table")
+
+        (version,) = LENGTH.unpack(f.read(LENGTH.size))
+        if version != VERSION:
+            raise ValueError(f"Unsupported columnar table version {version}")
+
+        (size,) = LENGTH.unpack(f.read(LENGTH.size))
+        schema = json.loads(f.read(size))
+        columns = [(name, kind) for name, kind in schema["columns"]]
+
+        strings = []
+        values = {name: [] for name, _ in columns}
+        while True:
+            b = f.read(LENGTH.size)
+            if not b:
+                break
+            (size,) = LENGTH.unpack(b)
+            header = json.loads(f.read(size))
+            strings.extend(header["strings"])
+            rows = header["rows"]
+
+            for name, kind in columns:
+                data = array(COLUMN_KINDS[kind])
+                data.fromfile(f, rows)
+                if sys.byteorder != "little":
+                    data.byteswap()
+
+                null = NULL_VALUES[kind]
+                if kind == "str":
+                    values[name].extend(None if v == -1 else strings[v] for v in data)
+                elif kind == "bool":
+                    values[name].extend(None if v == -1 else bool(v) for v in data)
+                elif kind == "float":
+                    values[name].extend(None if v != v else v for v in data)
+                else:
+                    values[name].extend(None if v == null else v for v in data)
+
+    return schema["table"], values
@@ -1,6 +1,12 @@
 from .build import Build  # noqa: F401
+from .check import Check  # noqa: F401
+from .diff import Diff  # noqa: F401
+from .export_columns import ExportColumns  # noqa: F401
+from .extract import Extract  # noqa: F401
 from .find import Find  # noqa: F401
 from .info import Info  # noqa: F401
 from .load import Load  # noqa: F401
+from .shard import Shard  # noqa: F401
 from .show import Show  # noqa: F401
+from .stats import Stats  # noqa: F401
 from .vuln import Vuln  # noqa: F401
@@ -101,7 +101,12 @@ class Build(Command):
         start = get_obj_by_handle(doc, args.start, spdx3.Element)
         target = get_obj_by_handle(doc, args.target, spdx3.Element)
 
-        chains = sorted(search(start, target), key=lambda x: (len(x), x))
+        chains = doc.cached(
+            "build chain",
+            args,
+            lambda: sorted(search(start, target), key=lambda x: (len(x), x)),
+            ("show", "shortest", "longest"),
+        )
         print(f"Found {len(chains)} chains:")
         if args.shortest and chains:
             chains = chains[:1]
@@ -0,0 +1,147 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+from ..cmd import Command, register
+from ..jsonld import is_named
+from ..output import add_output_args, get_writer
+from ..parallel import map_chunks
+from .. import spdx3
+
+CHECKS = ("missing-reference", "duplicate-id", "handle-collision")
+CHECK_FIELDS = ("check", "id", "handle", "referrers", "files", "ids")
+
+
+# Iterates over the IDs referenced by an object (or its blank node children)
+# that do not match any object
+def iter_missing_references(doc, obj):
+    visited = set()
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        for iri, (prop, *_) in o._OBJ_PROPERTIES.items():
+            values = o[iri]
+            if isinstance(prop, spdx3.ListProp):
+                prop = prop.prop
+            else:
+                values = (values,)
+
+            if not isinstance(prop, spdx3.ObjectProp):
+                continue
+
+            for v in values:
+                if isinstance(v, str):
+                    if v not in spdx3.NAMED_INDIVIDUALS and doc.find_by_id(v) is None:
+                        yield v
+                elif v is not None and not is_named(v) and v not in visited:
+                    visited.add(v)
+                    stack.append(v)
+
+
+# Checks a chunk of objects. This runs in worker processes, which inherit the
+# Document when they are forked
+def check_objects(doc, objects):
+    missing = {}
+    collisions = {}
+    for o in objects:
+        handle = o._metadata.get("handle")
+        if handle is None:
+            continue
+
+        if doc.obj_by_handle.get(handle) is not o:
+            collisions.setdefault(handle, []).append(o._id or handle)
+
+        for _id in iter_missing_references(doc, o):
+            missing.setdefault(_id, []).append(handle)
+
+    return missing, collisions
+
+
+@register("check", "Check references, IDs and handles for problems")
+class Check(Command):
+    @classmethod
+    def get_args(cls, parser):
+        parser.add_argument(
+            "--check",
+            choices=CHECKS,
+            action="append",
+            help="Only run check CHECK. May be specified multiple times. Default is all checks",
+        )
+        parser.add_argument(
+            "--report-imports",
+            action="store_true",
+            help="Also report references to IDs that are imported by an SpdxDocument as missing",
+        )
+        parser.add_argument(
+            "--jobs",
+            "-j",
+            metavar="N",
+            type=int,
+            default=1,
+            help="Number of processes used to check objects. Default is %(default)s",
+        )
+        add_output_args(parser, select=False)
+
+    @classmethod
+    def handle(cls, args, doc):
+        checks = set(args.check or CHECKS)
+
+        # Load any files needed from the catalog first
+        doc.link()
+
+        objects = [o for o in doc.foreach() if o in doc.objects or is_named(o)]
+
+        missing = {}
+        collisions = {}
+        for m, c in map_chunks(check_objects, doc, objects, args.jobs):
+            for _id, referrers in m.items():
+                missing.setdefault(_id, []).extend(referrers)
+            for handle, ids in c.items():
+                collisions.setdefault(handle, []).extend(ids)
+
+        if not args.report_imports:
+            for d in doc.foreach_type(spdx3.SpdxDocument):
+                for i in d.import_:
+                    missing.pop(i.externalSpdxId, None)
+
+        problems = 0
+        with get_writer(args, fields=CHECK_FIELDS) as w:
+            if "missing-reference" in checks:
+                for _id in sorted(missing.keys()):
+                    referrers = sorted(set(missing[_id]))
+                    w.write_item(
+                        {
+                            "check": "missing-reference",
+                            "id": _id,
+                            "referrers": referrers,
+                        },
+                        f"Missing reference {_id} from {len(referrers)} object(s):\n  "
+                        + "\n  ".join(referrers),
+                    )
+                problems += len(missing)
+
+            if "duplicate-id" in checks:
+                for _id in sorted(doc.duplicates.keys()):
+                    files = [str(p) for p in doc.duplicates[_id]]
+                    w.write_item(
+                        {"check": "duplicate-id", "id": _id, "files": files},
+                        f"Duplicate ID {_id} discarded from:\n  " + "\n  ".join(files),
+                    )
+                problems += len(doc.duplicates)
+
+            if "handle-collision" in checks:
+                for handle in sorted(collisions.keys()):
+                    kept = doc.obj_by_handle[handle]
+                    ids = [kept._id or handle] + sorted(collisions[handle])
+                    w.write_item(
+                        {"check": "handle-collision", "handle": handle, "ids": ids},
+                        f"Handle collision '{handle}':\n  " + "\n  ".join(ids),
+                    )
+                problems += len(collisions)
+
+            if args.format == "text":
+                w.write(
+                    f"Checked {doc.count()} object(s): {problems} problem(s) found\n"
+                )
+
+        return 1 if problems else 0
@@ -0,0 +1,210 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import collections
+import sys
+import time
+from pathlib import Path
+
+from ..cmd import Command, register
+from ..fingerprint import fingerprint_object, get_object_content
+from ..jsonld import is_named
+from ..main import Document
+from ..output import add_output_args, get_name, get_writer
+from .. import spdx3
+
+DIFF_FIELDS = ("change", "type", "handle", "id", "old_id", "name", "properties")
+
+
+def ref_id(o):
+    if isinstance(o, spdx3.SHACLObject):
+        return o._id
+    return o
+
+
+# Returns the key used to match elements that have different IDs in the two
+# documents, or None if the element can only be matched by ID
+def get_match_key(o):
+    if isinstance(o, spdx3.Relationship):
+        return (
+            o.TYPE,
+            ref_id(o.from_),
+            o.relationshipType,
+            tuple(sorted(ref_id(t) for t in o.to)),
+        )
+
+    name = get_name(o)
+    if name is None:
+        return None
+
+    if "software_packageVersion" in o._IRI:
+        return (o.TYPE, name, o.software_packageVersion)
+    return (o.TYPE, name, None)
+
+
+def get_changed_properties(old, new, ignore):
+    old_data = get_object_content(old, ignore)
+    new_data = get_object_content(new, ignore)
+    changed = [k for k, v in old_data.items() if new_data.get(k) != v]
+    changed.extend(k for k in new_data.keys() if k not in old_data)
+    return changed
+
+
+class DiffSide(object):
+    def __init__(self, path, doc, ignore):
+        self.path = path
+        self.doc = doc
+        self.elements = [o for o in doc.foreach() if is_named(o)]
+        self.by_id = {o._id: o for o in self.elements}
+        self.memo = {}
+        self.fingerprints = {
+            o: fingerprint_object(o, ignore, self.memo) for o in self.elements
+        }
+
+
+@register("diff", "Compare two SPDX 3 files")
+class Diff(Command):
+    @classmethod
+    def get_args(cls, parser):
+        parser.add_argument(
+            "--ignore",
+            metavar="PROPERTY",
+            action="append",
+            default=[],
+            help="Ignore changes to PROPERTY (e.g. creationInfo)",
+        )
+        parser.add_argument(
+            "--type",
+            metavar="TYPE",
+            help="Only compare objects of type TYPE (compact name or IRI) or a subclass of it",
+        )
+        parser.add_argument(
+            "--changes",
+            choices=("added", "removed", "changed"),
+            action="append",
+            help="Only show changes of this kind. May be specified multiple times. Default is all changes",
+        )
+        parser.add_argument("old", type=Path, help="Old SPDX 3 file")
+        parser.add_argument("new", type=Path, help="New SPDX 3 file")
+        add_output_args(parser, select=False)
+
+    @classmethod
+    def load(cls, path, args, doc):
+        start = time.time()
+        d = Document(doc.handle_terms)
+        d.load_file(path)
+        d.link_unlinked()
+        side = DiffSide(path, d, args.ignore)
+        print(
+            f"Loaded {d.count()} objects from {path} in {time.time() - start:.2f}s",
+            file=sys.stderr,
+        )
+        return side
+
+    @classmethod
+    def handle(cls, args, doc):
+        # Each file is loaded into its own document so that objects with the
+        # same ID do not collide
+        old = cls.load(args.old, args, doc)
+        new = cls.load(args.new, args, doc)
+
+        types = None
+        if args.type:
+            types = set(old.doc.foreach_type(args.type, match_subclass=True))
+            types |= set(new.doc.foreach_type(args.type, match_subclass=True))
+
+        changes = set(args.changes or ("added", "removed", "changed"))
+        counts = {"added": 0, "removed": 0, "changed": 0}
+
+        def include(o):
+            return types is None or o in types
+
+        with get_writer(args, fields=DIFF_FIELDS) as w:
+
+            def write(change, o, old_o=None, properties=None):
+                counts[change] += 1
+                if change not in changes:
+                    return
+
+                record = {
+                    "change": change,
+                    "type": o.COMPACT_TYPE or o.TYPE,
+                    "handle": o._metadata.get("handle"),
+                    "id": o._id,
+                    "old_id": old_o._id if old_o is not None else None,
+                    "name": get_name(o),
+                }
+                text = {"added": "+", "removed": "-", "changed": "~"}[change]
+                text += f" {record['type']} '{record['handle']}'"
+                if record["name"] is not None:
+                    text += f" {record['name']!r}"
+                if old_o is not None and old_o._id != o._id:
+                    text += f" (was {old_o._id})"
+                if properties is not None:
+                    record["properties"] = properties
+                    text += ": " + ", ".join(properties)
+
+                w.write_item(record, text)
+
+            def compare(old_o, new_o):
+                if old.fingerprints[old_o] == new.fingerprints[new_o]:
+                    return
+                write(
+                    "changed",
+                    new_o,
+                    old_o,
+                    get_changed_properties(old_o, new_o, args.ignore),
+                )
+
+            # Match by ID
+            unmatched_old = []
+            matched_new = set()
+            for o in old.elements:
+                if not include(o):
+                    continue
+
+                n = new.by_id.get(o._id)
+                if n is None or n.__class__ is not o.__class__:
+                    unmatched_old.append(o)
+                    continue
+
+                matched_new.add(n)
+                compare(o, n)
+
+            # Match the remaining elements by content key (e.g. name and
+            # version)
+            new_by_key = {}
+            unmatched_new = []
+            for o in new.elements:
+                if o in matched_new or not include(o):
+                    continue
+
+                key = get_match_key(o)
+                if key is None:
+                    unmatched_new.append(o)
+                else:
+                    new_by_key.setdefault(key, collections.deque()).append(o)
+
+            for o in unmatched_old:
+                key = get_match_key(o)
+                candidates = new_by_key.get(key) if key is not None else None
+                if not candidates:
+                    write("removed", o)
+                    continue
+
+                compare(o, candidates.popleft())
+
+            for o in unmatched_new:
+                write("added", o)
+
+            for candidates in new_by_key.values():
+                for o in candidates:
+                    write("added", o)
+
+            if args.format == "text":
+                w.write(
+                    f"{counts['added']} added, {counts['removed']} removed, {counts['changed']} changed\n"
+                )
+
+        return 0
@@ -0,0 +1,224 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import re
+from pathlib import Path
+
+from ..cmd import Command, register
+from ..columns import EXTENSIONS, FORMATS, TABLE_WRITERS
+from .. import spdx3
+from .stats import COMPACT_NAMES
+
+# Tables that are written in addition to the table for each type. The objects
+# table has a row for every object ID, including IDs that are referenced but
+# not defined by any input
+TABLES = {
+    "objects": (("oid", "ref"), ("type", "str"), ("handle", "str"), ("id", "str")),
+    "relationships": (
+        ("oid", "ref"),
+        ("from", "ref"),
+        ("relationshipType", "str"),
+        ("to", "ref"),
+    ),
+    "hashes": (("oid", "ref"), ("algorithm", "str"), ("hashValue", "str")),
+    "external_identifiers": (
+        ("oid", "ref"),
+        ("externalIdentifierType", "str"),
+        ("identifier", "str"),
+    ),
+    "list_values": (
+        ("oid", "ref"),
+        ("property", "str"),
+        ("index", "int"),
+        ("ref", "ref"),
+        ("value", "str"),
+    ),
+}
+
+# List properties that have their own table, so they are not written to the
+# list_values table
+LIST_TABLES = ("to", "verifiedUsing", "externalIdentifier")
+
+
+def get_kind(prop):
+    if isinstance(prop, spdx3.ObjectProp):
+        return "ref"
+    if isinstance(prop, spdx3.IntegerProp):
+        return "int"
+    if isinstance(prop, spdx3.FloatProp):
+        return "float"
+    if isinstance(prop, spdx3.BooleanProp):
+        return "bool"
+    return "str"
+
+
+def get_table_name(o):
+    return re.sub(r"\W", "_", o.COMPACT_TYPE or o.TYPE)
+
+
+class Exporter(object):
+    def __init__(self, path, fmt):
+        self.path = path
+        self.format = fmt
+        self.tables = {}
+        self.type_tables = {}
+        self.oids = {}
+
+        for name, columns in TABLES.items():
+            self.get_table(name, columns)
+
+    def get_table(self, name, columns=None):
+        t = self.tables.get(name)
+        if t is None:
+            t = TABLE_WRITERS[self.format](
+                self.path / (name + EXTENSIONS[self.format]), name, columns
+            )
+            self.tables[name] = t
+        return t
+
+    # Returns the table for the type of an object, and its columns for the
+    # scalar properties of the type. List properties are written to other
+    # tables
+    def get_type_table(self, o):
+        name = get_table_name(o)
+        t = self.type_tables.get(name)
+        if t is None:
+            columns = []
+            for iri, (prop, *_, pyname, compact) in o._OBJ_PROPERTIES.items():
+                if isinstance(prop, spdx3.ListProp):
+                    continue
+                if iri == "@id":
+                    columns.append(("id", "str", iri))
+                else:
+                    columns.append((compact or pyname, get_kind(prop), iri))
+
+            table = self.get_table(
+                name, [("oid", "ref")] + [(c, kind) for c, kind, _ in columns]
+            )
+            t = (table, columns)
+            self.type_tables[name] = t
+        return t
+
+    # Returns the dense integer ID of an object or ID. IDs that are referenced
+    # but are not defined by any object are added to the objects table when
+    # they are first seen
+    def get_oid(self, o):
+        if isinstance(o, str):
+            oid = self.oids.get(o)
+            if oid is None:
+                oid = len(self.oids)
+                self.oids[o] = oid
+                self.tables["objects"].add_row((oid, None, None, o))
+            return oid
+
+        key = o._id if o._id else o
+        oid = self.oids.get(key)
+        if oid is None:
+            oid = len(self.oids)
+            self.oids[key] = oid
+        return oid
+
+    def get_value(self, kind, v):
+        if v is None:
+            return None
+        if kind == "ref":
+            return self.get_oid(v)
+        if kind == "str":
+            if isinstance(v, str):
+                return COMPACT_NAMES.get(v, v)
+            return str(v)
+        return v
+
+    def add_object(self, o):
+        oid = self.get_oid(o)
+        self.tables["objects"].add_row(
+            (oid, o.COMPACT_TYPE or o.TYPE, o._metadata.get("handle"), o._id or None)
+        )
+
+        table, columns = self.get_type_table(o)
+        row = [oid]
+        for _, kind, iri in columns:
+            row.append(self.get_value(kind, o[iri]))
+        table.add_row(row)
+
+        for iri, (prop, *_, pyname, compact) in o._OBJ_PROPERTIES.items():
+            if not isinstance(prop, spdx3.ListProp) or pyname in LIST_TABLES:
+                continue
+
+            kind = get_kind(prop.prop)
+            for idx, v in enumerate(o[iri]):
+                v = self.get_value(kind, v)
+                if kind == "ref":
+                    row = (oid, compact or pyname, idx, v, None)
+                else:
+                    row = (oid, compact or pyname, idx, None, v)
+                self.tables["list_values"].add_row(row)
+
+        if isinstance(o, spdx3.Relationship):
+            from_ = self.get_value("ref", o.from_)
+            rel_type = self.get_value("str", o.relationshipType)
+            for to in o.to:
+                self.tables["relationships"].add_row(
+                    (oid, from_, rel_type, self.get_oid(to))
+                )
+
+        if isinstance(o, spdx3.Element):
+            for v in o.verifiedUsing:
+                if isinstance(v, spdx3.Hash):
+                    self.tables["hashes"].add_row(
+                        (oid, self.get_value("str", v.algorithm), v.hashValue)
+                    )
+
+            for v in o.externalIdentifier:
+                if isinstance(v, spdx3.ExternalIdentifier):
+                    self.tables["external_identifiers"].add_row(
+                        (
+                            oid,
+                            self.get_value("str", v.externalIdentifierType),
+                            v.identifier,
+                        )
+                    )
+
+    def close(self):
+        for t in self.tables.values():
+            t.close()
+
+
+@register("export-columns", "Export properties as tables for analysis")
+class ExportColumns(Command):
+    @classmethod
+    def get_args(cls, parser):
+        parser.add_argument(
+            "--output",
+            "-o",
+            metavar="DIR",
+            type=Path,
+            required=True,
+            help="Write tables to DIR",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            default="csv",
+            help="Table format. Default is %(default)s",
+        )
+
+    @classmethod
+    def handle(cls, args, doc):
+        args.output.mkdir(parents=True, exist_ok=True)
+
+        # The tables are written in a single pass over the objects. Rows are
+        # written as they are produced, so only the mapping of objects to
+        # integer IDs grows with the size of the Document
+        exporter = Exporter(args.output, args.format)
+        try:
+            for o in doc.obj_by_handle.values():
+                exporter.add_object(o)
+        finally:
+            exporter.close()
+
+        print(
+            f"Exported {doc.count()} object(s) to {len(exporter.tables)} table(s) in {args.output}"
+        )
+        return 0
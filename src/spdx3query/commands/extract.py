@@ -0,0 +1,120 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import collections
+import shlex
+from pathlib import Path
+
+from ..cmd import Command, register, CommandExit
+from ..jsonld import iter_references, write_jsonld
+from ..output import non_negative_int, select_objects
+from .. import spdx3
+
+from .find import Find, get_obj_by_handle
+
+
+def parse_query(query):
+    parser = argparse.ArgumentParser(prog="find", add_help=False)
+    Find.get_args(parser)
+    try:
+        return parser.parse_args(shlex.split(query))
+    except SystemExit as e:
+        raise CommandExit(e.code)
+
+
+# Returns the objects reachable from the root objects by following references
+# up to depth levels away (or without limit if depth is None), in the order
+# they were found. If relationships is True, Relationships from an object are
+# followed as if the object referenced them
+def get_closure(doc, roots, depth=None, relationships=False):
+    rels = {}
+    if relationships:
+        for rel in doc.foreach_type(spdx3.Relationship, match_subclass=True):
+            if isinstance(rel.from_, spdx3.SHACLObject):
+                rels.setdefault(rel.from_, []).append(rel)
+
+    result = []
+    visited = set()
+    queue = collections.deque()
+
+    def add(o, d):
+        if o not in visited:
+            visited.add(o)
+            result.append(o)
+            queue.append((o, d))
+
+    for o in roots:
+        add(o, 0)
+
+    while queue:
+        o, d = queue.popleft()
+        if depth is not None and d >= depth:
+            continue
+
+        for rel in rels.get(o, []):
+            add(rel, d)
+
+        for c in iter_references(o):
+            add(c, d + 1)
+
+    return result
+
+
+@register("extract", "Extract a subset of objects to a new SPDX 3 file")
+class Extract(Command):
+    @classmethod
+    def get_args(cls, parser):
+        parser.add_argument(
+            "--output",
+            "-o",
+            type=Path,
+            required=True,
+            help="Output SPDX 3 file",
+        )
+        parser.add_argument(
+            "--query",
+            "-q",
+            metavar="FIND_ARGS",
+            help="Extract objects that match a find query, e.g. '--type build_Build'",
+        )
+        parser.add_argument(
+            "--depth",
+            metavar="N",
+            type=non_negative_int,
+            help="Only extract objects that are at most N references away from the requested objects. Default is unlimited",
+        )
+        parser.add_argument(
+            "--relationships",
+            "-r",
+            action="store_true",
+            help="Also extract Relationships from extracted Elements (and the Elements they relate to)",
+        )
+        parser.add_argument(
+            "handle",
+            metavar="HANDLE",
+            nargs="*",
+            default=[],
+            help="Extract object with handle HANDLE",
+        )
+
+    @classmethod
+    def handle(cls, args, doc):
+        roots = [get_obj_by_handle(doc, h) for h in args.handle]
+
+        if args.query:
+            qargs = parse_query(args.query)
+            roots.extend(select_objects(qargs, Find.query(qargs, doc)))
+
+        if not roots:
+            print("No objects to extract")
+            return 1
+
+        objects = get_closure(doc, roots, args.depth, args.relationships)
+
+        with args.output.open("wb") as f:
+            write_jsonld(objects, f)
+
+        print(f"Extracted {len(objects)} object(s) to {args.output}")
+        return 0
@@ -2,13 +2,24 @@
 #
 # SPDX-License-Identifier: MIT
 
-import re
+import argparse
+import itertools
 
 from ..cmd import Command, register, CommandExit
+from ..jsonld import is_named
+from ..output import (
+    add_output_args,
+    get_items,
+    non_negative_int,
+    select_objects,
+    write_count,
+    write_items,
+    write_objects,
+    ITEM_SORT_KEYS,
+    OUTPUT_ARGS,
+)
 from .. import spdx3
 
-from .show import show_object
-
 
 def check_enum(val, enum, desc):
     if val in enum.NAMED_INDIVIDUALS.values():
@@ -38,11 +49,14 @@ def get_obj_by_handle(doc, handle, typ=None):
     return o
 
 
-def find_relationships(doc, from_, rel_type, to):
+def get_rel_type(rel_type):
     if rel_type == "-":
-        rel_type_iri = None
-    else:
-        rel_type_iri = check_enum(rel_type, spdx3.RelationshipType, "Relationship Type")
+        return None
+    return check_enum(rel_type, spdx3.RelationshipType, "Relationship Type")
+
+
+def find_relationships(doc, from_, rel_type, to):
+    rel_type_iri = get_rel_type(rel_type)
 
     if from_ is None or from_ == "-":
         from_obj = None
@@ -92,6 +106,28 @@ class Find(Command):
             action="append",
             default=[],
         )
+        parser.add_argument(
+            "--property",
+            nargs=2,
+            metavar=("PROPERTY", "VALUE"),
+            help="Find objects where the string property PROPERTY (e.g. software_packageVersion) is VALUE",
+            action="append",
+            default=[],
+        )
+        parser.add_argument(
+            "--property-pattern",
+            nargs=2,
+            metavar=("PROPERTY", "PATTERN"),
+            help="Find objects where the string property PROPERTY matches PATTERN (regex pattern)",
+            action="append",
+            default=[],
+        )
+        parser.add_argument(
+            "--ignore-case",
+            "-I",
+            action="store_true",
+            help="Ignore case when matching names and properties",
+        )
         parser.add_argument(
             "--external-id",
             nargs=2,
@@ -150,111 +186,239 @@ class Find(Command):
             help="Find Elments in the 'to' side of a Relationship type TYPE where handle FROM is in the from field",
             dest="rel_from",
         )
+        depth_group = parser.add_mutually_exclusive_group()
+        depth_group.add_argument(
+            "--depth",
+            metavar="N",
+            type=non_negative_int,
+            default=1,
+            help="Follow up to N relationships for --to and --from. Default is %(default)s",
+        )
+        depth_group.add_argument(
+            "--transitive",
+            action="store_true",
+            help="Follow any number of relationships for --to and --from",
+        )
+        parser.add_argument(
+            "--jobs",
+            "-j",
+            metavar="N",
+            type=int,
+            default=1,
+            help="Number of processes used to evaluate patterns that cannot be answered from an index. Default is %(default)s",
+        )
+        add_output_args(parser)
 
     @classmethod
-    def handle(self, args, doc):
-        final = set(doc.foreach())
+    def query(cls, args, doc):
+        # Filters that can be answered from an index produce sets of objects,
+        # while filters that must examine each object are applied as
+        # predicates. The predicates are only evaluated for candidates that
+        # pass all the sets, and only until enough results have been found
+        sets = []
+        predicates = []
 
         if args.type:
-            final &= set(doc.foreach_type(args.type, match_subclass=False))
+            sets.append(set(doc.foreach_type(args.type, match_subclass=False)))
 
         if args.subclass:
-            final &= set(doc.foreach_type(args.subclass, match_subclass=True))
+            sets.append(set(doc.foreach_type(args.subclass, match_subclass=True)))
 
         if args.verified_using:
-            objs = set()
-
             algo, val = args.verified_using
             algo_iri = check_enum(algo, spdx3.HashAlgorithm, "hash algorithm")
 
-            for o in doc.foreach_type(spdx3.Element, match_subclass=True):
+            def verified_using(o):
+                if not isinstance(o, spdx3.Element):
+                    return False
+
                 for v in o.verifiedUsing:
                     if isinstance(v, spdx3.Hash):
                         if v.algorithm == algo_iri and v.hashValue == val:
-                            objs.add(o)
+                            return True
+                return False
 
-            final &= objs
+            predicates.append(verified_using)
 
         for name in args.name:
-            objs = set()
-            for o in doc.foreach_type(spdx3.Element, match_subclass=True):
-                if o.name == name:
-                    objs.add(o)
-
-            final &= objs
+            sets.append(doc.get_property_index("name").find(name, args.ignore_case))
 
         for pattern in args.name_pattern:
-            objs = set()
-            for o in doc.foreach_type(spdx3.Element, match_subclass=True):
-                if o.name is None:
-                    continue
+            sets.append(
+                doc.get_property_index("name").search(
+                    pattern, args.ignore_case, args.jobs
+                )
+            )
 
-                if re.search(pattern, o.name):
-                    objs.add(o)
+        for prop, value in args.property:
+            sets.append(doc.get_property_index(prop).find(value, args.ignore_case))
 
-            final &= objs
+        for prop, pattern in args.property_pattern:
+            sets.append(
+                doc.get_property_index(prop).search(
+                    pattern, args.ignore_case, args.jobs
+                )
+            )
 
         if args.references:
-            objs = set()
             ref_obj = get_obj_by_handle(doc, args.references)
-            for o in doc.foreach():
-                if ref_obj in o.iter_objects():
-                    objs.add(o)
-            final &= objs
+            predicates.append(lambda o: ref_obj in o.iter_objects())
 
         for ext_id in args.external_id:
             ext_id_type, ident = ext_id
-            final &= set(
-                doc.foreach_external_id(
+            sets.append(
+                doc.get_external_id_index(
                     check_enum(
                         ext_id_type,
                         spdx3.ExternalIdentifierType,
                         "external identifier type",
-                    ),
-                    lambda i: i == ident,
-                )
+                    )
+                ).find(ident)
             )
 
         for ext_id in args.external_id_pattern:
             ext_id_type, pattern = ext_id
-            final &= set(
-                doc.foreach_external_id(
+            sets.append(
+                doc.get_external_id_index(
                     check_enum(
                         ext_id_type,
                         spdx3.ExternalIdentifierType,
                         "external identifier type",
-                    ),
-                    lambda i: re.search(pattern, i),
-                )
+                    )
+                ).search(pattern, jobs=args.jobs)
             )
 
         if args.relationship:
-            final &= set(find_relationships(doc, *args.relationship))
+            sets.append(set(find_relationships(doc, *args.relationship)))
+
+        depth = None if args.transitive else args.depth
 
         if args.rel_to:
-            objs = set()
-            for rel in find_relationships(doc, "-", *args.rel_to):
-                objs.add(rel.from_)
+            rel_type, to = args.rel_to
+            if to == "-":
+                objs = set()
+                for rel in find_relationships(doc, "-", rel_type, to):
+                    objs.add(rel.from_)
+            else:
+                objs = set(
+                    doc.foreach_reachable(
+                        [get_obj_by_handle(doc, to)],
+                        get_rel_type(rel_type),
+                        reverse=True,
+                        depth=depth,
+                    )
+                )
 
-            final &= objs
+            sets.append(objs)
 
         if args.rel_from:
-            objs = set()
-            for rel in find_relationships(doc, *args.rel_from, "-"):
-                objs |= set(rel.to)
+            from_, rel_type = args.rel_from
+            if from_ == "-":
+                objs = set()
+                for rel in find_relationships(doc, from_, rel_type, "-"):
+                    objs |= set(rel.to)
+            else:
+                objs = set(
+                    doc.foreach_reachable(
+                        [get_obj_by_handle(doc, from_)],
+                        get_rel_type(rel_type),
+                        depth=depth,
+                    )
+                )
 
-            final &= objs
+            sets.append(objs)
 
         remove = set()
         for r in args.exclude:
             remove.add(get_obj_by_handle(doc, r))
 
-        final -= remove
+        if sets:
+            sets.sort(key=len)
+            # Relationships can refer to IDs that are not loaded, which are
+            # not objects in the Document
+            candidates = set(
+                o for o in sets[0].intersection(*sets[1:]) if doc.contains(o)
+            )
+        else:
+            candidates = doc.foreach()
+
+        def matches(o):
+            if o in remove:
+                return False
+            return all(p(o) for p in predicates)
+
+        return (o for o in candidates if matches(o))
+
+    @classmethod
+    def handle(cls, args, doc):
+        results = doc.cached(
+            "find",
+            args,
+            lambda: cls.query(args, doc),
+            OUTPUT_ARGS + ("show", "count", "jobs"),
+        )
 
         if args.count:
-            print(f"Found {len(final)} object(s)")
+            write_count(args, results)
         else:
-            print(f"Found {len(final)} object(s):")
-            for o in sorted(list(final)):
-                show_object(o, args.show)
+            write_objects(args, results, args.show)
+        return 0
+
+    # Relationships are only followed in a single shard, so --to and --from
+    # cannot follow more than one relationship
+    @classmethod
+    def supports_shards(cls, args):
+        follows = (args.rel_to and args.rel_to[1] != "-") or (
+            args.rel_from and args.rel_from[0] != "-"
+        )
+        return not follows or (not args.transitive and args.depth <= 1)
+
+    # Finds the results in one shard of a sharded dataset. Named objects may
+    # be found in several shards (e.g. as the 'to' side of a Relationship in
+    # a different shard), so they are deduplicated by ID when the results
+    # are merged. Blank nodes are only found in the shards that own them
+    @classmethod
+    def shard(cls, args, doc, owned):
+        results = [o for o in cls.query(args, doc) if is_named(o) or owned(o)]
+        if args.count:
+            return (
+                set(o._id for o in results if is_named(o)),
+                sum(1 for o in results if not is_named(o)),
+            )
+
+        # When sorting, the first results of the merged results must be in
+        # the first results of the shard that they came from
+        stop = None
+        if args.sort and args.limit is not None:
+            stop = args.offset + args.limit
+
+        return list(
+            select_objects(
+                argparse.Namespace(sort=args.sort, offset=0, limit=stop),
+                get_items(args, results, args.show),
+                ITEM_SORT_KEYS,
+            )
+        )
+
+    @classmethod
+    def merge(cls, args, results):
+        if args.count:
+            ids = set()
+            blank = 0
+            for shard_ids, shard_blank in results:
+                ids |= shard_ids
+                blank += shard_blank
+            write_count(args, range(len(ids) + blank))
+            return 0
+
+        def unique_items():
+            seen = set()
+            for record, text in itertools.chain.from_iterable(results):
+                if record["id"] is not None:
+                    if record["id"] in seen:
+                        continue
+                    seen.add(record["id"])
+                yield record, text
+
+        write_items(args, unique_items())
         return 0
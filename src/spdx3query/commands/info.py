@@ -3,6 +3,39 @@
 # SPDX-License-Identifier: MIT
 
 from ..cmd import Command, register
+from ..memory import SAMPLE_SIZE, MemoryUsage
+from ..progress import format_bytes
+
+
+def print_sizes(title, sizes, counts=None):
+    sizes = {k: v for k, v in sizes.items() if v}
+    print(f"{title}:")
+    width = max((len(k) for k in sizes), default=0)
+    for k, v in sorted(sizes.items(), key=lambda i: (-i[1], i[0])):
+        line = f"  {k:<{width}}  {format_bytes(v):>11}"
+        if counts is not None:
+            line += f"  ({counts[k]:.0f} objects)"
+        print(line)
+
+
+def print_memory(usage):
+    print()
+    print(
+        f"Estimated memory (sampled {usage.sampled} of {usage.object_count} objects): {format_bytes(usage.total())}"
+    )
+    print_sizes("By type", usage.by_type, usage.type_counts)
+    print_sizes("By property", usage.by_property)
+    print_sizes("Indexes", usage.indexes)
+
+    print("String sharing:")
+    width = max((len(k) for k in usage.interning), default=0)
+    for name, stats in sorted(usage.interning.items()):
+        rate = stats.rate()
+        if rate is None:
+            continue
+        print(
+            f"  {name:<{width}}  {rate:7.1%} of {stats.hits + stats.misses} repeated value(s) shared"
+        )
 
 
 @register("info", "Data Info")
@@ -19,6 +52,18 @@ class Info(Command):
             action="store_true",
             help="Show types found in Document",
         )
+        parser.add_argument(
+            "--memory",
+            action="store_true",
+            help="Show estimated memory used by types, properties and indexes",
+        )
+        parser.add_argument(
+            "--memory-sample",
+            metavar="N",
+            type=int,
+            default=SAMPLE_SIZE,
+            help="Estimate memory from N objects and index entries. Default is %(default)s",
+        )
 
     @classmethod
     def handle(self, args, doc):
@@ -31,10 +76,12 @@ class Info(Command):
                 print(f"  {m}")
         print(f"Type count:       {len(doc.obj_by_type)}")
         if args.show_types:
+            type_handles = {}
+            for k, v in doc.type_handle_map.items():
+                type_handles.setdefault(v, []).append(k)
+
             for t in sorted(list(doc.obj_by_type.keys())):
-                print(f"  {t}", end="")
-                for k, v in doc.type_handle_map.items():
-                    if t == v:
-                        print(f" ({k})", end="")
-                print()
+                print(f"  {t}" + "".join(f" ({k})" for k in type_handles.get(t, [])))
+        if args.memory:
+            print_memory(MemoryUsage(doc, args.memory_sample))
         return 0
@@ -4,7 +4,6 @@
 
 from pathlib import Path
 from ..cmd import Command, register
-from .. import spdx3
 
 
 @register("load", "Load SPDX 3 Data File")
@@ -20,8 +19,11 @@ class Load(Command):
 
     @classmethod
     def handle(self, args, doc):
-        d = spdx3.JSONLDDeserializer()
-        for i in args.input:
-            with i.open("rb") as f:
-                d.read(f, doc)
+        pipeline = doc.load_files(args.input)
+        doc.link_unlinked()
+        if pipeline is not None:
+            pipeline.print_stats()
+
+        if doc.dedup is not None:
+            doc.dedup.report()
         return 0
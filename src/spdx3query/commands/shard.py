@@ -0,0 +1,119 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+from pathlib import Path
+
+from ..cmd import Command, register
+from ..jsonld import is_named, iter_references, write_jsonld
+from ..shard import (
+    get_blank_owners,
+    get_foreign_blank_nodes,
+    get_shard,
+    write_manifest,
+)
+
+
+def positive_int(s):
+    v = int(s)
+    if v < 1:
+        raise argparse.ArgumentTypeError(f"{s} is not a positive integer")
+    return v
+
+
+@register("shard", "Split the input files into shards")
+class Shard(Command):
+    @classmethod
+    def get_args(cls, parser):
+        parser.add_argument(
+            "--output",
+            "-o",
+            metavar="DIR",
+            type=Path,
+            required=True,
+            help="Write shards and the manifest to DIR",
+        )
+        parser.add_argument(
+            "--count",
+            "-n",
+            metavar="N",
+            type=positive_int,
+            required=True,
+            help="Number of shards",
+        )
+        parser.add_argument(
+            "--manifest",
+            metavar="NAME",
+            default="manifest.json",
+            help="File name of the manifest in the output directory. Default is %(default)s",
+        )
+
+    @classmethod
+    def handle(cls, args, doc):
+        owners = {}
+
+        def get_owner(o):
+            if not is_named(o):
+                return 0
+            owner = owners.get(o._id)
+            if owner is None:
+                owner = get_shard(o._id, args.count)
+                owners[o._id] = owner
+            return owner
+
+        # Every named object is owned by the shard selected by the hash of its
+        # ID. Blank nodes at the top level of the inputs are owned by the
+        # first shard, and other blank nodes by the lowest shard of the
+        # objects that contain them
+        shards = [[] for _ in range(args.count)]
+        for o in doc.obj_by_id.values():
+            if is_named(o):
+                shards[get_owner(o)].append(o)
+
+        for o in doc.objects:
+            if not is_named(o):
+                shards[0].append(o)
+
+        blank_owners = get_blank_owners(
+            (o for objects in shards for o in objects), get_owner
+        )
+        memo = {}
+
+        args.output.mkdir(parents=True, exist_ok=True)
+
+        files = []
+        total_stubs = 0
+        for idx, objects in enumerate(shards):
+            # Objects in other shards that are referenced by objects in this
+            # shard are copied into it as stubs, so that each shard can be
+            # loaded and queried on its own
+            stubs = {}
+            for o in objects:
+                for r in iter_references(o):
+                    if get_owner(r) != idx:
+                        stubs.setdefault(r._id, r)
+
+            written = objects + list(stubs.values())
+            name = f"shard-{idx:04d}.spdx.json"
+            with (args.output / name).open("wb") as f:
+                write_jsonld(written, f)
+
+            files.append(
+                {
+                    "path": name,
+                    "objects": len(objects),
+                    "stubs": len(stubs),
+                    "foreign_blank_nodes": get_foreign_blank_nodes(
+                        written, idx, blank_owners, memo
+                    ),
+                }
+            )
+            total_stubs += len(stubs)
+
+        write_manifest(args.output / args.manifest, files)
+
+        print(
+            f"Wrote {args.count} shard(s) with {sum(len(s) for s in shards)} object(s) and {total_stubs} stub(s) to {args.output}"
+        )
+        return 0
@@ -0,0 +1,166 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import sys
+from collections import Counter
+
+from ..cmd import Command, register
+from ..output import add_output_args, get_name, get_writer
+from .. import spdx3
+
+STATS_FIELDS = ("group", "value", "count")
+
+LICENSE_RELATIONSHIPS = (
+    spdx3.RelationshipType.hasConcludedLicense,
+    spdx3.RelationshipType.hasDeclaredLicense,
+)
+
+# Maps the IRI of every named individual (e.g. enum values) to its compact name
+COMPACT_NAMES = {}
+for c in set(spdx3.SHACLObject.CLASSES.values()):
+    for compact, iri in c.NAMED_INDIVIDUALS.items():
+        COMPACT_NAMES[iri] = compact
+
+
+def get_label(v):
+    if isinstance(v, spdx3.SHACLObject):
+        if isinstance(v, spdx3.simplelicensing_LicenseExpression):
+            label = v.simplelicensing_licenseExpression
+        else:
+            label = get_name(v) or v._id or v._metadata.get("handle")
+    elif isinstance(v, str):
+        label = COMPACT_NAMES.get(v, v)
+    else:
+        label = str(v)
+
+    # Many objects share the same values, so interning them keeps the
+    # counters small and makes lookups a pointer comparison
+    return sys.intern(label) if label is not None else None
+
+
+def iter_types(o):
+    yield o.COMPACT_TYPE or o.TYPE
+
+
+def iter_suppliers(o):
+    if isinstance(o, spdx3.Artifact) and o.suppliedBy is not None:
+        yield get_label(o.suppliedBy)
+
+
+def iter_licenses(o):
+    if (
+        isinstance(o, spdx3.Relationship)
+        and o.relationshipType in LICENSE_RELATIONSHIPS
+    ):
+        for t in o.to:
+            yield get_label(t)
+
+
+def iter_hash_algorithms(o):
+    if isinstance(o, spdx3.Hash):
+        yield get_label(o.algorithm)
+
+
+def iter_relationship_types(o):
+    if isinstance(o, spdx3.Relationship):
+        yield get_label(o.relationshipType)
+
+
+def property_labels(prop):
+    def iter_labels(o):
+        if prop not in o._IRI:
+            return
+
+        v = getattr(o, prop)
+        if isinstance(v, spdx3.ListProxy):
+            for i in v:
+                yield get_label(i)
+        elif v is not None:
+            yield get_label(v)
+
+    return iter_labels
+
+
+GROUPS = {
+    "type": iter_types,
+    "supplier": iter_suppliers,
+    "license": iter_licenses,
+    "hash-algorithm": iter_hash_algorithms,
+    "relationship-type": iter_relationship_types,
+}
+
+
+@register("stats", "Show aggregate statistics")
+class Stats(Command):
+    @classmethod
+    def get_args(cls, parser):
+        parser.add_argument(
+            "--group",
+            choices=sorted(GROUPS.keys()),
+            action="append",
+            help="Only show statistics for GROUP. May be specified multiple times. Default is all groups",
+        )
+        parser.add_argument(
+            "--group-by",
+            metavar="PROPERTY",
+            action="append",
+            default=[],
+            help="Also count the values of property PROPERTY (e.g. software_primaryPurpose)",
+        )
+        parser.add_argument(
+            "--top",
+            metavar="N",
+            type=int,
+            help="Only show the N most common values in each group",
+        )
+        add_output_args(parser, select=False)
+
+    @classmethod
+    def count(cls, args, objects):
+        groups = [(g, GROUPS[g]) for g in (args.group or GROUPS.keys())]
+        groups.extend((p, property_labels(p)) for p in args.group_by)
+
+        counters = [(name, Counter(), iter_labels) for name, iter_labels in groups]
+
+        # All statistics are gathered in a single pass over the objects
+        for o in objects:
+            for _, counter, iter_labels in counters:
+                for label in iter_labels(o):
+                    if label is not None:
+                        counter[label] += 1
+
+        return [(name, counter) for name, counter, _ in counters]
+
+    @classmethod
+    def write(cls, args, counters):
+        with get_writer(args, fields=STATS_FIELDS) as w:
+            for name, counter in counters:
+                if args.format == "text":
+                    w.write(f"{name} ({sum(counter.values())}):\n")
+
+                for value, count in counter.most_common(args.top):
+                    w.write_item(
+                        {"group": name, "value": value, "count": count},
+                        f"  {count:>8} {value}",
+                    )
+
+    @classmethod
+    def handle(cls, args, doc):
+        cls.write(args, cls.count(args, doc.obj_by_handle.values()))
+        return 0
+
+    # Counts the objects owned by one shard of a sharded dataset
+    @classmethod
+    def shard(cls, args, doc, owned):
+        return cls.count(args, (o for o in doc.obj_by_handle.values() if owned(o)))
+
+    @classmethod
+    def merge(cls, args, results):
+        totals = {}
+        for counters in results:
+            for name, counter in counters:
+                totals.setdefault(name, Counter()).update(counter)
+
+        cls.write(args, list(totals.items()))
+        return 0
@@ -2,11 +2,10 @@
 #
 # SPDX-License-Identifier: MIT
 
-from ..cmd import Command, register
+from ..cmd import Command, register, CommandExit
+from ..output import add_output_args, get_items, write_items, write_objects, OUTPUT_ARGS
 from .. import spdx3
 
-from .show import show_object
-
 
 @register("vuln", "Vulnerability information")
 class Vuln(Command):
@@ -34,6 +33,7 @@ class Vuln(Command):
             nargs="+",
             help="CVE to check",
         )
+        add_output_args(affected_by_command)
         affected_by_command.set_defaults(func=cls.handle_affected_by)
 
     @classmethod
@@ -41,28 +41,79 @@ class Vuln(Command):
         pass
 
     @classmethod
-    def handle_affected_by(cls, args, doc):
-        objs = set()
+    def find_cves(cls, doc, c):
+        return set(
+            doc.foreach_external_id(
+                spdx3.ExternalIdentifierType.cve,
+                lambda i: i == c,
+                obj_type=spdx3.security_Vulnerability,
+            )
+        )
 
-        for c in args.cve:
-            cves = set(
-                doc.foreach_external_id(
-                    spdx3.ExternalIdentifierType.cve,
-                    lambda i: i == c,
-                    obj_type=spdx3.security_Vulnerability,
+    @classmethod
+    def find_affected(cls, doc, cves):
+        objs = set()
+        for cve in cves:
+            objs |= set(
+                doc.foreach_relationship_to(
+                    spdx3.RelationshipType.hasAssociatedVulnerability, cve
                 )
             )
+        return objs
 
+    @classmethod
+    def affected_by(cls, args, doc):
+        objs = set()
+
+        for c in args.cve:
+            cves = cls.find_cves(doc, c)
             if not cves:
                 print(f"Unable to find {c}")
-                return 1
+                raise CommandExit(1)
 
-            for cve in cves:
-                objs |= set(
-                    doc.foreach_relationship_to(
-                        spdx3.RelationshipType.hasAssociatedVulnerability, cve
-                    )
-                )
+            objs |= cls.find_affected(doc, cves)
+
+        return objs
+
+    @classmethod
+    def handle_affected_by(cls, args, doc):
+        objs = doc.cached(
+            "vuln affected-by",
+            args,
+            lambda: cls.affected_by(args, doc),
+            OUTPUT_ARGS + ("show",),
+        )
+        write_objects(args, objs, args.show)
+        return 0
+
+    # A CVE only needs to be found in one shard of a sharded dataset. Each
+    # shard that has a relationship to it also has a copy of the affected
+    # element, so they are deduplicated when the results are merged
+    @classmethod
+    def shard_affected_by(cls, args, doc, owned):
+        found = []
+        objs = set()
+        for c in args.cve:
+            cves = cls.find_cves(doc, c)
+            if cves:
+                found.append(c)
+            objs |= cls.find_affected(doc, cves)
+
+        return found, list(get_items(args, objs, args.show))
+
+    @classmethod
+    def merge_affected_by(cls, args, results):
+        found = set()
+        items = {}
+        for f, shard_items in results:
+            found.update(f)
+            for record, text in shard_items:
+                items.setdefault(record["id"] or record["handle"], (record, text))
+
+        for c in args.cve:
+            if c not in found:
+                print(f"Unable to find {c}")
+                return 1
 
-        for obj in objs:
-            show_object(obj, args.show)
+        write_items(args, items.values())
+        return 0
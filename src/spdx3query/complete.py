@@ -0,0 +1,74 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+from . import spdx3
+
+# Completing a very short prefix on a large document would match most of the
+# handles, which is not useful to display
+MAX_COMPLETIONS = 1000
+
+
+# Completes commands, handles and HANDLE.PATH expressions for readline
+class Completer(object):
+    def __init__(self, doc, commands, lock, readline=None):
+        self.doc = doc
+        self.commands = sorted(commands)
+        self.lock = lock
+        self.readline = readline
+        self.matches = []
+
+    def complete(self, text, state):
+        # readline calls this with increasing state until None is returned,
+        # so the matches are only found on the first call
+        if state == 0:
+            line = self.readline.get_line_buffer()
+            command = not line[: self.readline.get_begidx()].strip()
+            try:
+                with self.lock:
+                    self.matches = self.get_matches(text, command)
+            except Exception:
+                self.matches = []
+
+        if state < len(self.matches):
+            return self.matches[state]
+        return None
+
+    def get_matches(self, text, command=False):
+        if command:
+            return [c for c in self.commands if c.startswith(text)]
+
+        if "." not in text:
+            return self.doc.complete_handle(text, MAX_COMPLETIONS)
+
+        path, _, prefix = text.rpartition(".")
+        o = self.doc.find_by_path(path or ".", load=False)
+        if isinstance(o, spdx3.ListProxy) and len(o) == 1:
+            o = o[0]
+        if not isinstance(o, spdx3.SHACLObject):
+            return []
+
+        return [
+            f"{path}.{pyname}"
+            for pyname, _, _ in o.property_keys()
+            if pyname.startswith(prefix) and not pyname.startswith("_")
+        ]
+
+
+def install_completer(doc, commands, lock):
+    try:
+        import readline
+    except ImportError:
+        return None
+
+    completer = Completer(doc, commands, lock, readline)
+
+    # Handles contain '-' and paths contain '.', so only whitespace separates
+    # words
+    readline.set_completer_delims(" \t\n")
+    readline.set_completer(completer.complete)
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    return completer
@@ -0,0 +1,202 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import sys
+
+from . import spdx3
+
+
+def fingerprint_data(data):
+    return hashlib.sha256(
+        json.dumps(
+            data,
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+# Returns the content of an object as JSON compatible data, without its ID so
+# that objects can be compared by content even if they have different IDs.
+# Other named objects are only included by their ID, while blank nodes are
+# included by content. The content of blank nodes is cached in memo, since
+# the same blank node (e.g. CreationInfo) is often shared by many objects
+def get_object_content(obj, ignore=(), memo=None):
+    def get_value(v):
+        if isinstance(v, spdx3.SHACLObject):
+            if v._id and not spdx3.is_blank_node(v._id):
+                return v._id
+
+            if memo is None:
+                return get_object_content(v, ignore)
+
+            if v not in memo:
+                memo[v] = get_object_content(v, ignore, memo)
+            return memo[v]
+
+        if isinstance(v, spdx3.ListProxy):
+            return [get_value(i) for i in v]
+
+        if isinstance(v, (str, int, float, bool)) or v is None:
+            return v
+
+        return str(v)
+
+    data = {"type": obj.COMPACT_TYPE or obj.TYPE}
+    for _, iri, compact in obj.property_keys():
+        key = compact or iri
+        if iri == "@id" or key in ignore:
+            continue
+
+        v = get_value(obj[iri])
+        if v is not None and v != []:
+            data[key] = v
+
+    return data
+
+
+def fingerprint_object(obj, ignore=(), memo=None):
+    return fingerprint_data(get_object_content(obj, ignore, memo))
+
+
+def get_graph(data):
+    if isinstance(data, dict) and "@graph" in data:
+        return data["@graph"]
+    if isinstance(data, list):
+        return data
+    return [data]
+
+
+def get_item_id(item):
+    for key in ("spdxId", "@id"):
+        _id = item.get(key)
+        if isinstance(_id, str):
+            return _id
+    return None
+
+
+class Deduplicator(object):
+    def __init__(self):
+        self.fingerprints = {}
+        self.blank_nodes = {}
+        self.conflicts = []
+        self.file_stats = []
+        self.file_count = 0
+
+    def filter_graph(self, path, graph):
+        # Blank node IDs are only meaningful inside of a single file, so they
+        # are replaced with an ID derived from the content of the node. This
+        # allows identical blank nodes from different files to be merged, and
+        # prevents unrelated blank nodes with the same label from colliding
+        self.file_count += 1
+        blank = {}
+        for item in graph:
+            if isinstance(item, dict):
+                _id = get_item_id(item)
+                if _id is not None and spdx3.is_blank_node(_id):
+                    blank[_id] = item
+
+        blank_ids = {}
+        in_progress = set()
+        cyclic = set()
+
+        def local_id(_id):
+            return f"_:{self.file_count}-{_id[2:]}"
+
+        def get_blank_id(_id):
+            if _id in blank_ids:
+                return blank_ids[_id]
+
+            if _id in in_progress:
+                cyclic.add(_id)
+                return local_id(_id)
+
+            in_progress.add(_id)
+            content = {
+                k: rewrite(v)
+                for k, v in blank[_id].items()
+                if k not in ("spdxId", "@id")
+            }
+            in_progress.discard(_id)
+
+            if _id in cyclic:
+                blank_ids[_id] = local_id(_id)
+            else:
+                blank_ids[_id] = "_:" + fingerprint_data(content)
+            return blank_ids[_id]
+
+        def rewrite(v):
+            if isinstance(v, str):
+                if v in blank:
+                    return get_blank_id(v)
+                return v
+            if isinstance(v, list):
+                return [rewrite(i) for i in v]
+            if isinstance(v, dict):
+                return {k: rewrite(i) for k, i in v.items()}
+            return v
+
+        result = []
+        total = 0
+        duplicates = 0
+        conflicts = 0
+        for item in graph:
+            if not isinstance(item, dict):
+                result.append(item)
+                continue
+
+            total += 1
+            item = rewrite(item)
+            fp = fingerprint_data(item)
+            _id = get_item_id(item) or fp
+
+            if _id in self.fingerprints:
+                first_fp, first_path = self.fingerprints[_id]
+                if first_fp == fp:
+                    duplicates += 1
+                else:
+                    conflicts += 1
+                    self.conflicts.append((_id, first_path, path))
+                continue
+
+            self.fingerprints[_id] = (fp, path)
+            result.append(item)
+
+        self.file_stats.append((path, total, duplicates, conflicts))
+        return result
+
+    def forget(self, path):
+        self.fingerprints = {k: v for k, v in self.fingerprints.items() if v[1] != path}
+        self.blank_nodes = {
+            k: v for k, v in self.blank_nodes.items() if k in self.fingerprints
+        }
+
+    # Blank nodes lose their ID when they are linked, but identical blank
+    # nodes in files that are loaded later are discarded and refer to the
+    # first one by its content derived ID, so the objects are kept by ID
+    def add_blank_node(self, _id, obj):
+        if _id in self.fingerprints:
+            self.blank_nodes[_id] = obj
+
+    def find_blank_node(self, _id):
+        return self.blank_nodes.get(_id)
+
+    def report(self):
+        print("Deduplication summary:", file=sys.stderr)
+        for path, total, duplicates, conflicts in self.file_stats:
+            print(
+                f"  {path}: {duplicates} of {total} object(s) deduplicated, {conflicts} conflict(s)",
+                file=sys.stderr,
+            )
+
+        if self.conflicts:
+            print(f"Conflicting duplicates: {len(self.conflicts)}", file=sys.stderr)
+            for _id, first_path, path in self.conflicts:
+                print(f"  {_id} ({first_path} kept, {path} discarded)", file=sys.stderr)
+
+        self.file_stats = []
+        self.conflicts = []
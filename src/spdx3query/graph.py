@@ -0,0 +1,90 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+from . import spdx3
+
+
+# Returns the key used for an object in the graph. Named objects are keyed by
+# their ID, so that the graph does not change when a reference is linked to
+# the actual object
+def get_node_key(o):
+    if isinstance(o, spdx3.SHACLObject):
+        if o._id and not spdx3.is_blank_node(o._id):
+            return o._id
+    return o
+
+
+# A directed graph of the elements related by Relationship objects. Each node
+# is assigned a dense integer ordinal, and edges are stored as adjacency lists
+# of ordinals for each relationship type (and for all types combined under
+# None) in both directions
+class RelationshipGraph(object):
+    def __init__(self, relationships):
+        self.ordinals = {}
+        self.nodes = []
+        self.forward = {None: {}}
+        self.reverse = {None: {}}
+
+        for rel in relationships:
+            if rel.from_ is None:
+                continue
+
+            types = (None,)
+            if rel.relationshipType is not None:
+                types = (None, rel.relationshipType)
+
+            f = self.get_ordinal(rel.from_)
+            for to in rel.to:
+                t = self.get_ordinal(to)
+                for typ in types:
+                    self.forward.setdefault(typ, {}).setdefault(f, []).append(t)
+                    self.reverse.setdefault(typ, {}).setdefault(t, []).append(f)
+
+    def get_ordinal(self, o):
+        key = get_node_key(o)
+        ordinal = self.ordinals.get(key)
+        if ordinal is None:
+            ordinal = len(self.nodes)
+            self.ordinals[key] = ordinal
+            self.nodes.append(key)
+        return ordinal
+
+    # Returns the keys of the nodes that can be reached from the start objects
+    # by following relationships of type typ (or any type if None) at most
+    # depth times (or without limit if depth is None). If reverse is True,
+    # relationships are followed from their 'to' side to their 'from' side.
+    # The start objects are only included if they are reachable from one of
+    # the start objects, i.e. there is a cycle
+    def reachable(self, starts, typ=None, *, reverse=False, depth=None):
+        edges = (self.reverse if reverse else self.forward).get(typ, {})
+
+        # A node is marked in the bitmap once it has been queued, so each node
+        # and edge is examined at most once, even if the graph has cycles
+        queued = bytearray(len(self.nodes))
+        reached = []
+        level = []
+        for o in starts:
+            ordinal = self.ordinals.get(get_node_key(o))
+            if ordinal is not None and not queued[ordinal]:
+                queued[ordinal] = 1
+                level.append(ordinal)
+
+        starts = set(level)
+        d = 0
+        while level and (depth is None or d < depth):
+            next_level = []
+            for n in level:
+                for t in edges.get(n, ()):
+                    if not queued[t]:
+                        queued[t] = 1
+                        reached.append(t)
+                        next_level.append(t)
+                    elif t in starts:
+                        # Cycle back to a start node
+                        starts.discard(t)
+                        reached.append(t)
+            level = next_level
+            d += 1
+
+        return [self.nodes[n] for n in reached]
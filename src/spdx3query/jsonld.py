@@ -0,0 +1,123 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+
+from . import spdx3
+
+
+def is_named(o):
+    return bool(o._id) and not spdx3.is_blank_node(o._id)
+
+
+# Iterates over the named objects referenced by an object, including those
+# referenced by its (possibly nested) blank node children
+def iter_references(obj):
+    visited = set()
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        for c in o.iter_objects(visited=visited):
+            if is_named(c):
+                yield c
+            else:
+                stack.append(c)
+
+
+# Finds blank nodes that are referenced from more than one place in the
+# objects. These are written as separate @graph nodes so they are not
+# duplicated in each object that references them
+def get_shared_blank_nodes(objects):
+    counts = {}
+    shared = []
+
+    def visit(o):
+        for c in o.iter_objects():
+            if is_named(c):
+                continue
+
+            counts[c] = counts.get(c, 0) + 1
+            if counts[c] == 1:
+                visit(c)
+            elif counts[c] == 2:
+                shared.append(c)
+
+    for o in objects:
+        visit(o)
+
+    return shared
+
+
+# Encodes a subset of the objects in a document. Named objects are only
+# written in full at the top level of the @graph, and as a reference
+# everywhere else, even if they are not part of the subset. Blank node labels
+# are always reassigned, since the labels in the source files are only
+# meaningful inside of the file they came from
+class SubsetEncodeState(spdx3.EncodeState):
+    def __init__(self):
+        super().__init__()
+        self.current = None
+
+    def get_object_id(self, o):
+        if is_named(o):
+            return o._id
+
+        if o not in self.blank_objects:
+            self.blank_objects[o] = f"_:{o.__class__.__name__}{len(self.blank_objects)}"
+
+        return self.blank_objects[o]
+
+    def is_written(self, o):
+        if o is not self.current and is_named(o):
+            return True
+        return super().is_written(o)
+
+
+# Encodes a single object to JSON-LD data, with any other named objects
+# written as references
+def encode_object(obj):
+    state = SubsetEncodeState()
+    state.current = obj
+    encoder = spdx3.JSONLDEncoder()
+    obj.encode(encoder, state)
+    return encoder.data
+
+
+# Writes objects to a SPDX 3 JSON-LD file. Each object is encoded directly to
+# the file as it is written instead of building the complete JSON document in
+# memory first. Returns the number of @graph nodes written
+def write_jsonld(objects, f):
+    objects = list(objects)
+    top = set(objects)
+    shared = [o for o in get_shared_blank_nodes(objects) if o not in top]
+
+    # Blank nodes written at the top level of the @graph need an ID so they
+    # can be referenced, and are marked as written so that they are only
+    # referenced until it is their turn to be written
+    state = SubsetEncodeState()
+    for o in shared + objects:
+        if not is_named(o):
+            state.add_refed(o)
+            state.add_written(o)
+
+    h = spdx3.JSONLDInlineEncoder(f, hashlib.sha1())
+    h.write('{"@context":')
+    if len(spdx3.CONTEXT_URLS) == 1:
+        h.write(json.dumps(spdx3.CONTEXT_URLS[0]))
+    else:
+        h.write(json.dumps(spdx3.CONTEXT_URLS))
+    h.write(',"@graph":')
+
+    count = 0
+    with h.write_list() as list_s:
+        for o in shared + objects:
+            state.current = o
+            state.written_objects.discard(o)
+            with list_s.write_list_item() as item_s:
+                o.encode(item_s, state)
+            count += 1
+
+    h.write("}")
+    return count
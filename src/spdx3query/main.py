@@ -5,7 +5,15 @@
 # SPDX-License-Identifier: MIT
 
 import argparse
+import bisect
+import contextlib
+import hashlib
+import io
+import json
+import os
 import shlex
+import sys
+import threading
 import time
 import traceback
 import re
@@ -14,11 +22,24 @@ from pathlib import Path
 from .version import VERSION
 from .cmd import COMMANDS, CommandExit
 from .name import get_handle
+from .catalog import Catalog
+from .fingerprint import Deduplicator, get_graph
+from .textindex import TextIndex, property_values, external_id_values
+from .graph import RelationshipGraph
+from .cache import ResultCache, get_cache_key, key_contains
+from .complete import install_completer
+from .parallel import get_context
+from .pipeline import LoadPipeline
+from .progress import LoadProgress
+from .shard import get_owned, read_manifest
 from . import spdx3
 
 EPILOG = """
 """
 
+# Matches a path segment that indexes a list property, e.g. "to[1]"
+PATH_INDEX_RE = re.compile(r"(?P<prop>\w+)\[(?P<idx>\d+)\]")
+
 
 class ArgumentError(Exception):
     pass
@@ -43,11 +64,42 @@ def add_commands(subparser):
         p.set_defaults(func=c.handle)
 
 
+class SourceFile(object):
+    def __init__(self, path, mtime, size, digest):
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.digest = digest
+        self.objects = []
+
+
+class LinkVisited(set):
+    # Objects with an ID that are not being linked are assumed to already be
+    # linked, which prevents linking from walking the entire object graph
+    def __init__(self, objects):
+        super().__init__()
+        self.objects = objects
+
+    def __contains__(self, o):
+        if super().__contains__(o):
+            return True
+        return bool(o._id) and not spdx3.is_blank_node(o._id) and o not in self.objects
+
+
 class Document(spdx3.SHACLObjectSet):
     def __init__(self, handle_terms):
+        self.local_count = 0
+        self.loading = None
+        self.progress = None
+        self.pipelined = False
+        self.generation = 0
         super().__init__()
         self.handle_terms = handle_terms
         self.focus_object = None
+        self.catalog = None
+        self.dedup = None
+        self.sources = {}
+        self.cache = None
 
     def set_focus(self, o):
         if isinstance(o, spdx3.SHACLObject):
@@ -72,22 +124,57 @@ class Document(spdx3.SHACLObjectSet):
         self.obj_by_handle = {}
         self.type_handle_map = {}
         self.root_doc = None
+        self.unlinked = []
+        self.referrers = {}
+        self.duplicates = {}
+        self.text_indexes = {}
+        self.relationship_graph = None
+        self.sorted_handles = []
+        self.sorted_handles_generation = None
         super().create_index()
 
     def add_index(self, obj):
         super().add_index(obj)
-        if obj._id and not spdx3.is_blank_node(obj._id):
-            handle_str = obj._id
-            prefix = None
-        else:
-            handle_str = obj.TYPE + " " + hex(len(self.obj_by_handle))
-            prefix = "LOCAL"
+        self.generation += 1
+        if self.loading is not None:
+            self.loading.objects.append(obj)
+            if self.progress is not None:
+                self.progress.add_object()
+
+        for index, get_values in self.text_indexes.values():
+            for v in get_values(obj):
+                index.add(v, obj)
+
+        if isinstance(obj, spdx3.Relationship):
+            self.relationship_graph = None
+
+        # New objects need to be linked, as do any objects that reference the
+        # ID of the new object
+        self.unlinked.append(obj)
+        if obj._id and obj._id in self.referrers:
+            for o in self.referrers.pop(obj._id):
+                o._metadata["missing"].discard(obj._id)
+                self.unlinked.append(o)
+
+        # Objects that are re-indexed keep their existing handle, so that
+        # renamed handles are preserved
+        handle = obj._metadata.get("handle")
+        if handle is None:
+            if obj._id and not spdx3.is_blank_node(obj._id):
+                handle_str = obj._id
+                prefix = None
+            else:
+                handle_str = obj.TYPE + " " + hex(self.local_count)
+                prefix = "LOCAL"
+                self.local_count += 1
+
+            handle = get_handle(handle_str, self.handle_terms, prefix=prefix)
+            obj._metadata["handle"] = handle
 
-        handle = get_handle(handle_str, self.handle_terms, prefix=prefix)
-        obj._metadata["handle"] = handle
         if handle in self.obj_by_handle and self.obj_by_handle[handle] is not obj:
             print(
-                f"Warning: handle '{handle}' ({handle_str}) is not unique. Conflicts with {self.obj_by_handle[handle]._id}"
+                f"Warning: handle '{handle}' ({obj._id}) is not unique. Conflicts with {self.obj_by_handle[handle]._id}",
+                file=sys.stderr,
             )
         self.obj_by_handle[handle] = obj
 
@@ -98,27 +185,429 @@ class Document(spdx3.SHACLObjectSet):
 
         if isinstance(obj, spdx3.SpdxDocument):
             if self.root_doc is not None:
-                print("Warning: Multiple SpdxDocuments found!")
+                print("Warning: Multiple SpdxDocuments found!", file=sys.stderr)
             else:
                 self.root_doc = obj
 
+    def remove_index(self, obj):
+        self.generation += 1
+
+        def unreg_type(typ, compact, o, exact):
+            for t in (typ, compact):
+                if t in self.obj_by_type:
+                    self.obj_by_type[t].discard((exact, o))
+
+        for typ in spdx3.SHACLObject.CLASSES.values():
+            if isinstance(obj, typ):
+                unreg_type(
+                    typ._OBJ_TYPE, typ._OBJ_COMPACT_TYPE, obj, obj.__class__ is typ
+                )
+        unreg_type(obj.TYPE, obj.COMPACT_TYPE, obj, True)
+
+        if obj._id and self.obj_by_id.get(obj._id) is obj:
+            del self.obj_by_id[obj._id]
+
+        handle = obj._metadata.get("handle")
+        if self.obj_by_handle.get(handle) is obj:
+            del self.obj_by_handle[handle]
+
+        for m in obj._metadata.pop("missing", ()):
+            self.remove_referrer(m, obj)
+
+        for v in obj.iter_objects():
+            v._metadata.get("referenced_by", set()).discard(obj)
+
+        for index, get_values in self.text_indexes.values():
+            for v in get_values(obj):
+                index.remove(v, obj)
+
+        if isinstance(obj, spdx3.Relationship):
+            self.relationship_graph = None
+
+        self.objects.discard(obj)
+
+        if self.root_doc is obj:
+            self.root_doc = None
+
+        if self.focus_object is obj:
+            self.focus_object = None
+
     def count(self):
         return len(self.obj_by_handle)
 
+    def find_by_id(self, _id, default=None):
+        if _id not in self.obj_by_id and self.dedup is not None:
+            o = self.dedup.find_blank_node(_id)
+            if o is not None and self.contains(o):
+                return o
+        return super().find_by_id(_id, default)
+
+    # Returns True if o is an object in the Document. Unlike the objects set,
+    # this includes inline objects (e.g. a Hash in verifiedUsing)
+    def contains(self, o):
+        return (
+            isinstance(o, spdx3.SHACLObject)
+            and self.obj_by_handle.get(o._metadata.get("handle")) is o
+        )
+
+    def get_text_index(self, key, get_values):
+        if key not in self.text_indexes:
+            index = TextIndex()
+            for o in self.obj_by_handle.values():
+                for v in get_values(o):
+                    index.add(v, o)
+            self.text_indexes[key] = (index, get_values)
+        return self.text_indexes[key][0]
+
+    def get_property_index(self, prop):
+        return self.get_text_index(("property", prop), property_values(prop))
+
+    def get_external_id_index(self, type_iri):
+        return self.get_text_index(
+            ("externalIdentifier", type_iri), external_id_values(type_iri)
+        )
+
+    def load_file(self, path):
+        path = path.resolve()
+        st = path.stat()
+        progress = self.progress
+        if progress is not None:
+            progress.begin(path.name, st.st_size)
+
+        try:
+            with path.open("rb") as f:
+                raw = progress.read(f) if progress is not None else f.read()
+
+            data = json.loads(raw)
+            if progress is not None:
+                progress.decoded()
+            self.load_data(path, st, hashlib.sha256(raw).hexdigest(), data)
+        finally:
+            if progress is not None:
+                progress.end()
+
+    # Loads a list of files. If pipelined loading is enabled, the next files
+    # are read and decoded while the objects of each file are indexed, and the
+    # LoadPipeline is returned so its timings can be shown
+    def load_files(self, paths):
+        if not self.pipelined:
+            for p in paths:
+                self.load_file(p)
+            return None
+
+        pipeline = LoadPipeline(paths)
+        pipeline.run(self.load_prefetched)
+        return pipeline
+
+    def load_prefetched(self, loaded):
+        progress = self.progress
+        if progress is not None:
+            progress.begin(loaded.path.name, loaded.st.st_size)
+            progress.prefetched(loaded.read_time)
+            progress.decoded()
+
+        try:
+            self.load_data(loaded.path, loaded.st, loaded.digest, loaded.data)
+        finally:
+            if progress is not None:
+                progress.end()
+
+    def load_data(self, path, st, digest, data):
+        if self.dedup is not None:
+            graph = self.dedup.filter_graph(path, get_graph(data))
+            # Keep the context so that compact terms expand the same way as
+            # they would without deduplication
+            if isinstance(data, dict) and "@context" in data:
+                data = {"@context": data["@context"], "@graph": graph}
+            else:
+                data = {"@graph": graph}
+
+        source = self.sources.get(path)
+        if source is None:
+            source = SourceFile(path, 0, 0, None)
+            self.sources[path] = source
+
+        source.mtime = st.st_mtime_ns
+        source.size = st.st_size
+        source.digest = digest
+
+        self.loading = source
+        try:
+            spdx3.JSONLDDeserializer().deserialize_data(data, self)
+        finally:
+            self.loading = None
+
+    def changed_files(self):
+        changed = []
+        for path, source in self.sources.items():
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+
+            if st.st_mtime_ns == source.mtime and st.st_size == source.size:
+                continue
+
+            digest = hashlib.sha256()
+            with path.open("rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+
+            if digest.hexdigest() == source.digest:
+                source.mtime = st.st_mtime_ns
+                continue
+
+            changed.append(path)
+
+        return changed
+
+    def add_referrer(self, _id, obj):
+        self.referrers.setdefault(_id, set()).add(obj)
+        obj._metadata.setdefault("missing", set()).add(_id)
+
+    def remove_referrer(self, _id, obj):
+        if _id in self.referrers:
+            self.referrers[_id].discard(obj)
+            if not self.referrers[_id]:
+                del self.referrers[_id]
+
+    def add_duplicate(self, _id, path):
+        self.duplicates.setdefault(_id, []).append(path)
+
+    def remove_duplicate(self, _id, path):
+        paths = [p for p in self.duplicates.get(_id, []) if p != path]
+        if paths:
+            self.duplicates[_id] = paths
+        else:
+            self.duplicates.pop(_id, None)
+
+    def link_objects(self, objects):
+        visited = LinkVisited(objects)
+        for o in objects:
+            if o in visited:
+                continue
+
+            missing = set()
+            o.link_helper(self, missing, visited)
+            missing -= spdx3.NAMED_INDIVIDUALS
+
+            old_missing = o._metadata.pop("missing", set())
+            for m in old_missing - missing:
+                self.remove_referrer(m, o)
+            for m in missing:
+                self.add_referrer(m, o)
+
+        # Record which objects reference each object, so that the references
+        # can be found when the object is removed
+        for o in objects:
+            for v in o.iter_objects():
+                v._metadata.setdefault("referenced_by", set()).add(o)
+
+        # Remove blank nodes
+        for o in objects:
+            if o._id and spdx3.is_blank_node(o._id):
+                if self.obj_by_id.get(o._id) is o:
+                    del self.obj_by_id[o._id]
+                if self.dedup is not None:
+                    self.dedup.add_blank_node(o._id, o)
+                del o._id
+
+        self.missing_ids = set(self.referrers.keys())
+
+    def link_unlinked(self):
+        if not self.unlinked:
+            return
+
+        # Skip any objects that were removed after they were added
+        objects = set(
+            o
+            for o in self.unlinked
+            if self.obj_by_handle.get(o._metadata["handle"]) is o
+        )
+        self.unlinked = []
+        self.link_objects(objects)
+
+    def unlink_objects(self, removed):
+        # Replaces references to removed objects with the object that
+        # replaced them, or their ID so that they are reported as missing
+        def unlink(o, v):
+            if isinstance(v, spdx3.SHACLObject) and v in removed:
+                new = self.find_by_id(v._id)
+                if new is not None and isinstance(new, v.__class__):
+                    new._metadata.setdefault("referenced_by", set()).add(o)
+                    return new
+                self.add_referrer(v._id, o)
+                self.missing_ids.add(v._id)
+                return v._id
+            return v
+
+        # Only the objects that referenced a removed object need to be checked
+        referrers = set()
+        for r in removed:
+            referrers |= r._metadata.pop("referenced_by", set())
+
+        for o in referrers:
+            if o in removed or not self.contains(o):
+                continue
+
+            for _, iri, _ in o.property_keys():
+                v = o[iri]
+                if isinstance(v, spdx3.ListProxy):
+                    if any(
+                        isinstance(i, spdx3.SHACLObject) and i in removed for i in v
+                    ):
+                        o[iri] = [unlink(o, i) for i in v]
+                elif isinstance(v, spdx3.SHACLObject) and v in removed:
+                    o[iri] = unlink(o, v)
+
+    def reload_file(self, path):
+        source = self.sources[path]
+        focus = self.focus_object
+        old_objects = source.objects
+        old_by_id = {}
+        for o in old_objects:
+            if o._id and not spdx3.is_blank_node(o._id):
+                old_by_id[o._id] = o
+            self.remove_index(o)
+
+        if self.dedup is not None:
+            self.dedup.forget(path)
+
+        for _id in list(self.duplicates.keys()):
+            self.remove_duplicate(_id, path)
+
+        source.objects = []
+        self.load_file(path)
+
+        # Objects that still exist are updated in place, so that references
+        # from other objects, the focus, and handles remain valid
+        new_objects = []
+        removed = set()
+        added = 0
+        updated = 0
+        for o in source.objects:
+            old = old_by_id.pop(o._id, None) if o._id else None
+            if old is not None and old.__class__ is not o.__class__:
+                removed.add(old)
+                old = None
+
+            if old is None:
+                if o._id and not spdx3.is_blank_node(o._id):
+                    added += 1
+                new_objects.append(o)
+                continue
+
+            was_top = o in self.objects
+            self.remove_index(o)
+            old.__dict__["_obj_data"] = o.__dict__["_obj_data"]
+            self.add_index(old)
+            if was_top:
+                self.objects.add(old)
+            new_objects.append(old)
+            updated += 1
+
+        source.objects = new_objects
+        removed |= set(old_by_id.values())
+        if removed:
+            self.unlink_objects(removed)
+
+        if (
+            focus is not None
+            and self.obj_by_handle.get(focus._metadata["handle"]) is focus
+        ):
+            self.focus_object = focus
+
+        self.link_unlinked()
+        return added, len(removed), updated
+
+    def reload(self):
+        for path in self.changed_files():
+            start = time.time()
+            added, removed, updated = self.reload_file(path)
+            elapsed = time.time() - start
+            print(
+                f"Reloaded {path} in {elapsed:.2f}s: {added} added, {removed} removed, {updated} updated",
+                file=sys.stderr,
+            )
+
+    def load_reference(self, _id):
+        o = self.find_by_id(_id)
+        if o is not None or self.catalog is None:
+            return o
+
+        path = self.catalog.find(_id)
+        if path is None or path in self.sources:
+            return None
+
+        self.load_catalog_files([path])
+        return self.find_by_id(_id)
+
+    # Loads the catalog files that define any of the IDs that are not loaded
+    # yet. Returns True if any files were loaded
+    def load_references(self, ids):
+        if self.catalog is None:
+            return False
+
+        paths = self.catalog.find_files(ids) - self.sources.keys()
+        if not paths:
+            return False
+
+        self.load_catalog_files(paths)
+        return True
+
+    def load_catalog_files(self, paths):
+        old_count = self.count()
+        start = time.time()
+        for p in sorted(paths):
+            self.load_file(p)
+        self.link_unlinked()
+        elapsed = time.time() - start
+        print(
+            f"Loaded {self.count() - old_count} objects from {len(paths)} catalog file(s) in {elapsed:.2f}s",
+            file=sys.stderr,
+        )
+
     def foreach_type(self, typ, **kwargs):
         if typ in self.type_handle_map:
             typ = self.type_handle_map[typ]
         return super().foreach_type(typ, **kwargs)
 
-    def find_by_handle(self, handle):
+    def find_by_handle(self, handle, *, load=True):
         if handle == ".":
             return self.focus_object
 
         if handle in self.obj_by_handle:
             return self.obj_by_handle[handle]
+
+        if self.catalog is not None and load:
+            _id = self.catalog.find_handle(handle, self.handle_terms)
+            if _id is not None:
+                return self.load_reference(_id)
+
         return None
 
-    def find_by_path(self, handle):
+    # Returns the handles that start with prefix in sorted order, up to limit
+    # handles. The sorted list of handles is only rebuilt when it is needed
+    # after the Document has changed
+    def complete_handle(self, prefix, limit=None):
+        if self.sorted_handles_generation != self.generation:
+            self.sorted_handles = sorted(self.obj_by_handle.keys())
+            self.sorted_handles_generation = self.generation
+
+        handles = self.sorted_handles
+        result = []
+        idx = bisect.bisect_left(handles, prefix)
+        while idx < len(handles) and handles[idx].startswith(prefix):
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(handles[idx])
+            idx += 1
+        return result
+
+    # Resolves a handle followed by an optional path of properties, e.g.
+    # "HANDLE.to[1].name". If load is False, references are not loaded from
+    # the catalog
+    def find_by_path(self, handle, *, load=True):
         split_path = []
         if handle != "." and "." in handle:
             p = handle.split(".")
@@ -129,14 +618,14 @@ class Document(spdx3.SHACLObjectSet):
                 handle = p[0]
                 split_path = p[1:]
 
-        o = self.find_by_handle(handle)
-        if o is None:
-            o = self.find_by_id(handle)
+        o = self.find_by_handle(handle, load=load)
+        if o is None and load:
+            o = self.load_reference(handle)
         if o is None:
             return o
 
         for p in split_path:
-            m = re.fullmatch(r"(?P<prop>\w+)\[(?P<idx>\d+)\]", p)
+            m = PATH_INDEX_RE.fullmatch(p) if "[" in p else None
             if m is not None:
                 o = getattr(o, m.group("prop"))
                 o = o[int(m.group("idx"))]
@@ -144,6 +633,10 @@ class Document(spdx3.SHACLObjectSet):
                 o = getattr(o, p)
                 if isinstance(o, spdx3.ListProxy) and len(o) == 1:
                     o = o[0]
+
+            # Resolve references that are not loaded yet from the catalog
+            if load and isinstance(o, str) and spdx3.is_IRI(o):
+                o = self.load_reference(o) or o
         return o
 
     def rename_handle(self, from_handle, to_handle):
@@ -152,19 +645,54 @@ class Document(spdx3.SHACLObjectSet):
             del self.obj_by_handle[from_handle]
             o._metadata["handle"] = to_handle
             self.obj_by_handle[to_handle] = o
+            self.generation += 1
+
+    # Returns the result of compute() for a command, reusing the result from
+    # an earlier invocation with the same arguments if the Document has not
+    # changed since
+    def cached(self, name, args, compute, ignore=()):
+        if self.cache is None:
+            return compute()
+
+        # Arguments that refer to the focus object give a different result
+        # if the focus changes
+        key = get_cache_key(name, args, ignore)
+        if key_contains(key, "."):
+            key += (self.get_focus_handle(),)
+
+        return self.cache.get(key, self.generation, compute)
 
     def foreach_relationship(self, from_, typ, to):
-        for rel in self.foreach_type(spdx3.Relationship, match_subclass=True):
+        def matches(rel):
             if typ is not None and rel.relationshipType != typ:
-                continue
+                return False
 
             if to is not None and to not in rel.to:
-                continue
+                return False
 
             if from_ is not None and rel.from_ != from_:
-                continue
+                return False
+
+            return True
+
+        # The elements that the relationships refer to are loaded from the
+        # catalog, which can add more matching relationships
+        while True:
+            rels = [
+                rel
+                for rel in self.foreach_type(spdx3.Relationship, match_subclass=True)
+                if matches(rel)
+            ]
+            ids = set(
+                i
+                for rel in rels
+                for i in [rel.from_] + list(rel.to)
+                if isinstance(i, str)
+            )
+            if not self.load_references(ids):
+                break
 
-            yield rel
+        yield from rels
 
     def foreach_relationship_from(self, from_, typ):
         for rel in self.foreach_relationship(from_, typ, None):
@@ -175,6 +703,32 @@ class Document(spdx3.SHACLObjectSet):
         for rel in self.foreach_relationship(None, typ, to):
             yield rel.from_
 
+    def get_relationship_graph(self):
+        if self.relationship_graph is None:
+            self.relationship_graph = RelationshipGraph(
+                self.foreach_type(spdx3.Relationship, match_subclass=True)
+            )
+        return self.relationship_graph
+
+    def foreach_reachable(self, starts, typ, *, reverse=False, depth=None):
+        # Elements that are reached but not loaded are loaded from the catalog
+        # and the search is repeated, since their relationships may reach
+        # more elements
+        while True:
+            keys = self.get_relationship_graph().reachable(
+                starts, typ, reverse=reverse, depth=depth
+            )
+            if not self.load_references(k for k in keys if isinstance(k, str)):
+                break
+
+        for key in keys:
+            if isinstance(key, str):
+                o = self.find_by_id(key)
+                if o is not None:
+                    yield o
+            else:
+                yield key
+
     def foreach_external_id(self, type_iri, check_id, obj_type=spdx3.Element):
         for o in self.foreach_type(obj_type, match_subclass=True):
             for v in o.externalIdentifier:
@@ -185,8 +739,39 @@ class Document(spdx3.SHACLObjectSet):
                     if check_id(v.identifier):
                         yield o
 
+    def decode(self, decoder):
+        # The index is maintained incrementally as objects are added, so
+        # unlike the base class it is not recreated for each file
+        for obj_d in decoder.read_list():
+            o = spdx3.SHACLObject.decode(obj_d, objectset=self)
+
+            # Decoding an object with the same ID as an existing object
+            # returns the existing object, so the new definition is discarded
+            if o in self.objects and o._id and not spdx3.is_blank_node(o._id):
+                self.add_duplicate(
+                    o._id, self.loading.path if self.loading is not None else None
+                )
+
+            self.objects.add(o)
+
     def link(self):
-        missing = super().link()
+        # Only objects that have been added since the last link, and objects
+        # that reference the IDs of those new objects, need to be linked
+        self.link_unlinked()
+
+        if self.catalog is not None:
+            while True:
+                ids = set(self.missing_ids)
+                if self.root_doc is not None:
+                    ids |= set(i.externalSpdxId for i in self.root_doc.import_)
+
+                paths = self.catalog.find_files(ids) - self.sources.keys()
+                if not paths:
+                    break
+
+                self.load_catalog_files(paths)
+
+        missing = set(self.missing_ids)
         if self.root_doc is None:
             return missing
 
@@ -197,11 +782,6 @@ class Document(spdx3.SHACLObjectSet):
 
 
 def handle_interactive(args, doc):
-    try:
-        import readline  # noqa
-    except ImportError:
-        pass
-
     path_history = []
 
     def handle_help(args, doc):
@@ -277,6 +857,27 @@ def handle_interactive(args, doc):
         doc.rename_handle(from_handle, args.to)
         return 0
 
+    def handle_reload(args, doc):
+        doc.reload()
+        return 0
+
+    def handle_cache_stats(args, doc):
+        if doc.cache is None:
+            print("Result cache is disabled")
+            return 1
+        doc.cache.print_stats()
+        return 0
+
+    def handle_cache_clear(args, doc):
+        if doc.cache is not None:
+            doc.cache.clear()
+        return 0
+
+    def watch():
+        while not watch_stop.wait(args.watch_interval):
+            with doc_lock:
+                doc.reload()
+
     parser = InteractiveParser(add_help=False, epilog=EPILOG)
     command_subparser = parser.add_subparsers(
         title="command",
@@ -304,6 +905,25 @@ def handle_interactive(args, doc):
     rehandle_parser.add_argument("to", help="New handle")
     rehandle_parser.set_defaults(func=handle_rehandle)
 
+    reload_parser = command_subparser.add_parser(
+        "reload", help="Reload input files that have changed"
+    )
+    reload_parser.set_defaults(func=handle_reload)
+
+    cache_parser = command_subparser.add_parser("cache", help="Manage result cache")
+    cache_commands = cache_parser.add_subparsers(
+        title="command",
+        description="Command to execute",
+        metavar="COMMAND",
+        required=True,
+    )
+    cache_commands.add_parser("stats", help="Show cache statistics").set_defaults(
+        func=handle_cache_stats
+    )
+    cache_commands.add_parser("clear", help="Clear cache").set_defaults(
+        func=handle_cache_clear
+    )
+
     quit_parser = command_subparser.add_parser("quit", help="Quit", add_help=False)
     quit_parser.set_defaults(func=handle_quit)
 
@@ -317,6 +937,16 @@ def handle_interactive(args, doc):
     if doc.root_doc is not None:
         doc.set_focus(doc.root_doc)
 
+    if args.cache_size > 0:
+        doc.cache = ResultCache(int(args.cache_size * 1024 * 1024))
+
+    doc_lock = threading.Lock()
+    install_completer(doc, command_subparser.choices.keys(), doc_lock)
+
+    watch_stop = threading.Event()
+    if args.watch:
+        threading.Thread(target=watch, daemon=True).start()
+
     while True:
         try:
             focus = doc.get_focus_handle()
@@ -331,8 +961,13 @@ def handle_interactive(args, doc):
 
             cmd_args = parser.parse_args(c)
 
-            cmd_args.func(cmd_args, doc)
+            with doc_lock:
+                cmd_args.func(cmd_args, doc)
 
+        except EOFError:
+            print()
+            watch_stop.set()
+            return 0
         except KeyboardInterrupt:
             print("Interrupted")
         except ArgumentError as e:
@@ -340,11 +975,84 @@ def handle_interactive(args, doc):
         except CommandExit:
             pass
         except ShellExit:
+            watch_stop.set()
             return 0
         except Exception:
             traceback.print_exc()
 
 
+# Runs a command on one shard of a sharded dataset in a worker process. Output
+# from the command (e.g. errors for handles that are not in the shard) is
+# captured, since it is only reported if the command fails in every shard
+def _query_shard(job):
+    path, foreign, shard, count, handle_terms, cls, name, state = job
+    doc = Document(handle_terms)
+    doc.load_file(path)
+    doc.link_unlinked()
+
+    owned = get_owned(doc, shard, count, foreign)
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        try:
+            result = getattr(cls, name)(
+                argparse.Namespace(**state), doc, owned.__contains__
+            )
+            return 0, result, out.getvalue()
+        except CommandExit as e:
+            return e.exit_code, None, out.getvalue()
+
+
+# Runs a command on each shard listed in a manifest in parallel, and merges
+# the partial results. Commands support this by implementing a shard method
+# (named after their handle method, e.g. shard_affected_by for
+# handle_affected_by) that returns the partial result for the objects owned by
+# a shard, and a corresponding merge method. Commands can also implement
+# supports_shards to reject arguments that cannot be answered from shards
+def handle_shards(args):
+    cls = getattr(args.func, "__self__", None)
+    name = args.func.__name__.replace("handle", "shard", 1)
+    if (
+        cls is None
+        or not hasattr(cls, name)
+        or not getattr(cls, "supports_shards", lambda args: True)(args)
+    ):
+        print("Command does not support --shards")
+        return 1
+
+    try:
+        paths = read_manifest(args.shards)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Unable to read shard manifest {args.shards}: {e}")
+        return 1
+
+    state = {k: v for k, v in vars(args).items() if k != "func"}
+    # Workers cannot start their own worker processes
+    if "jobs" in state:
+        state["jobs"] = 1
+
+    jobs = [
+        (path, foreign, idx, len(paths), args.handle_terms, cls, name, state)
+        for idx, (path, foreign) in enumerate(paths)
+    ]
+
+    start = time.time()
+    ctx, _ = get_context()
+    with ctx.Pool(min(args.shard_jobs, len(jobs))) as pool:
+        results = pool.map(_query_shard, jobs)
+    elapsed = time.time() - start
+
+    print(f"Queried {len(paths)} shard(s) in {elapsed:.2f}s", file=sys.stderr)
+
+    ok = [result for code, result, _ in results if code == 0]
+    if not ok:
+        code, _, output = results[0]
+        print(output, end="")
+        return code
+
+    return getattr(cls, name.replace("shard", "merge", 1))(args, ok)
+
+
 def main(args=None):
     parser = argparse.ArgumentParser(description="Query SPDX 3 files", epilog=EPILOG)
     parser.add_argument(
@@ -367,6 +1075,35 @@ def main(args=None):
         type=int,
         default=3,
     )
+    parser.add_argument(
+        "--catalog",
+        metavar="DIR",
+        help="Directory of SPDX 3 files. Files from the directory are loaded on demand when an unresolved reference is encountered",
+        type=Path,
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Merge identical objects from overlapping input files by content and report conflicting duplicates",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Read and decode input files in background threads while objects are indexed, and show the time spent in each stage",
+    )
+    parser.add_argument(
+        "--shards",
+        metavar="MANIFEST",
+        type=Path,
+        help="Query the shards listed in shard manifest MANIFEST in parallel instead of input files. Only supported by some commands",
+    )
+    parser.add_argument(
+        "--shard-jobs",
+        metavar="N",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of processes used to query shards. Default is the number of CPUs",
+    )
 
     command_subparser = parser.add_subparsers(
         title="command",
@@ -379,21 +1116,72 @@ def main(args=None):
         "interactive",
         help="Interactive queries",
     )
+    interactive_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Automatically reload input files when they change",
+    )
+    interactive_parser.add_argument(
+        "--watch-interval",
+        metavar="SECONDS",
+        type=float,
+        default=2.0,
+        help="Interval to check for changed input files. Default is %(default)s",
+    )
+    interactive_parser.add_argument(
+        "--cache-size",
+        metavar="MB",
+        type=float,
+        default=64,
+        help="Memory budget for cached command results in MiB, or 0 to disable the cache. Default is %(default)s",
+    )
     interactive_parser.set_defaults(func=handle_interactive)
 
     add_commands(command_subparser)
 
     args = parser.parse_args(args)
 
-    d = spdx3.JSONLDDeserializer()
+    if args.shards:
+        if args.input or args.catalog:
+            parser.error("--shards cannot be used with --input or --catalog")
+
+        try:
+            return handle_shards(args)
+        except CommandExit as e:
+            return e.exit_code
+
     doc = Document(args.handle_terms)
+    # Status messages are written to stderr, so that the output of a command
+    # can be redirected to a file or another program. Progress is only shown
+    # on a terminal
+    if sys.stderr.isatty():
+        doc.progress = LoadProgress()
+
+    if args.dedup:
+        doc.dedup = Deduplicator()
+
+    doc.pipelined = args.pipeline
+
+    if args.catalog:
+        start = time.time()
+        doc.catalog = Catalog(args.catalog)
+        doc.catalog.update()
+        elapsed = time.time() - start
+        print(
+            f"Cataloged {doc.catalog.count()} IDs in {len(doc.catalog.files)} file(s) in {elapsed:.2f}s",
+            file=sys.stderr,
+        )
+
     start = time.time()
-    for i in args.input:
-        with i.open("rb") as f:
-            d.read(f, doc)
+    pipeline = doc.load_files(args.input)
+    doc.link_unlinked()
     elapsed = time.time() - start
 
-    print(f"Loaded {doc.count()} objects in {elapsed:.2f}s")
+    print(f"Loaded {doc.count()} objects in {elapsed:.2f}s", file=sys.stderr)
+    if pipeline is not None:
+        pipeline.print_stats()
+    if doc.dedup is not None:
+        doc.dedup.report()
 
     try:
         return args.func(args, doc)
@@ -0,0 +1,250 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import random
+import sys
+from collections import Counter
+
+from . import spdx3
+
+SAMPLE_SIZE = 10000
+
+# Each entry in obj_by_type is an (exact, object) tuple
+TYPE_ENTRY_SIZE = sys.getsizeof((True, None))
+
+
+# Returns a random sample of at most n of the items, and the factor that
+# scales a total over the sample to a total over all of the items
+def sample(items, n, rng):
+    count = len(items)
+    if count <= n:
+        return list(items), 1
+    return rng.sample(list(items), n), count / n
+
+
+def estimate(items, get_size, n, rng):
+    s, scale = sample(items, n, rng)
+    return sum(get_size(i) for i in s) * scale
+
+
+# Tracks how often equal strings are the same object. A string that is equal
+# to one that has already been seen is a hit if it is the same object, and a
+# miss if it is a separate copy
+class InternStats(object):
+    def __init__(self):
+        self.seen = {}
+        self.hits = 0
+        self.misses = 0
+
+    # Returns True if the string is a copy that uses its own memory
+    def add(self, s):
+        first = self.seen.get(s)
+        if first is None:
+            self.seen[s] = s
+            return True
+        if first is s:
+            self.hits += 1
+            return False
+        self.misses += 1
+        return True
+
+    def rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+
+# Estimates the memory retained by a Document from a sample of its objects
+# and of the entries in each of its indexes. Objects that are referenced by
+# other objects or by an index are only counted once, as part of the objects
+# themselves
+class MemoryUsage(object):
+    def __init__(self, doc, sample_size=SAMPLE_SIZE, seed=0):
+        self.doc = doc
+        self.sample_size = sample_size
+        self.rng = random.Random(seed)
+        self.object_count = len(doc.obj_by_handle)
+        self.sampled = 0
+        self.by_type = Counter()
+        self.type_counts = Counter()
+        self.by_property = Counter()
+        self.indexes = {}
+        self.interning = {}
+
+        self.measure_objects()
+        self.measure_indexes()
+
+    def intern_stats(self, name):
+        stats = self.interning.get(name)
+        if stats is None:
+            stats = self.interning[name] = InternStats()
+        return stats
+
+    # Returns the size of a string that is owned by the container being
+    # measured, i.e. zero if it is shared with another string that has already
+    # been counted
+    def string_size(self, name, s):
+        if self.intern_stats(name).add(s):
+            return sys.getsizeof(s)
+        return 0
+
+    def value_size(self, name, v):
+        if v is None or isinstance(v, spdx3.SHACLObject):
+            return 0
+        if isinstance(v, str):
+            return self.string_size(name, v)
+        if isinstance(v, spdx3.ListProxy):
+            return (
+                sys.getsizeof(v)
+                + sys.getsizeof(vars(v))
+                + sys.getsizeof(list(v))
+                + sum(self.value_size(name, i) for i in v)
+            )
+        return sys.getsizeof(v)
+
+    def measure_objects(self):
+        objects, scale = sample(
+            self.doc.obj_by_handle.values(), self.sample_size, self.rng
+        )
+        self.sampled = len(objects)
+
+        for o in objects:
+            data = o.__dict__["_obj_data"]
+            metadata = o._metadata
+            size = (
+                sys.getsizeof(o)
+                + sys.getsizeof(vars(o))
+                + sys.getsizeof(data)
+                + sys.getsizeof(metadata)
+            )
+            for k in ("missing", "referenced_by"):
+                if k in metadata:
+                    size += sys.getsizeof(metadata[k])
+            self.by_property["(object)"] += size * scale
+
+            for iri, v in data.items():
+                _, _, _, pyname, compact = o._OBJ_PROPERTIES[iri]
+                name = compact or pyname
+                s = self.value_size(name, v)
+                self.by_property[name] += s * scale
+                size += s
+
+            typ = o.COMPACT_TYPE or o.TYPE
+            self.by_type[typ] += size * scale
+            self.type_counts[typ] += scale
+
+    def measure_indexes(self):
+        doc = self.doc
+        n = self.sample_size
+        rng = self.rng
+
+        # The keys of the ID index are normally the ID strings of the objects
+        ids = self.intern_stats("obj_by_id keys")
+
+        def id_entry(item):
+            k, o = item
+            if k is o._id:
+                ids.hits += 1
+                return 0
+            ids.misses += 1
+            return sys.getsizeof(k)
+
+        self.indexes["objects"] = sys.getsizeof(doc.objects)
+        self.indexes["obj_by_id"] = sys.getsizeof(doc.obj_by_id) + estimate(
+            doc.obj_by_id.items(), id_entry, n, rng
+        )
+
+        # Handles are owned by obj_by_handle, and shared with the object
+        # metadata
+        handles = self.intern_stats("obj_by_handle keys")
+
+        def handle_entry(item):
+            k, o = item
+            if k is o._metadata.get("handle"):
+                handles.hits += 1
+            else:
+                handles.misses += 1
+            return sys.getsizeof(k)
+
+        self.indexes["obj_by_handle"] = sys.getsizeof(doc.obj_by_handle) + estimate(
+            doc.obj_by_handle.items(), handle_entry, n, rng
+        )
+
+        # Objects are added to the sets of both the full and compact name of
+        # their types with the same tuple, so the tuples are only counted for
+        # the full names
+        compact_types = set(
+            c._OBJ_COMPACT_TYPE
+            for c in spdx3.SHACLObject.CLASSES.values()
+            if c._OBJ_COMPACT_TYPE
+        )
+        size = sys.getsizeof(doc.obj_by_type)
+        for typ, entries in doc.obj_by_type.items():
+            size += sys.getsizeof(typ) + sys.getsizeof(entries)
+            if typ not in compact_types:
+                size += len(entries) * TYPE_ENTRY_SIZE
+        self.indexes["obj_by_type"] = size
+
+        self.indexes["type_handle_map"] = sys.getsizeof(doc.type_handle_map) + sum(
+            sys.getsizeof(k) for k in doc.type_handle_map
+        )
+        self.indexes["sorted_handles"] = sys.getsizeof(doc.sorted_handles)
+
+        def id_set_entry(item):
+            k, v = item
+            return sys.getsizeof(k) + sys.getsizeof(v)
+
+        self.indexes["referrers"] = sys.getsizeof(doc.referrers) + estimate(
+            doc.referrers.items(), id_set_entry, n, rng
+        )
+        self.indexes["missing_ids"] = sys.getsizeof(doc.missing_ids)
+        self.indexes["duplicates"] = sys.getsizeof(doc.duplicates) + estimate(
+            doc.duplicates.items(), id_set_entry, n, rng
+        )
+        self.indexes["unlinked"] = sys.getsizeof(doc.unlinked)
+        self.indexes["sources"] = sum(
+            sys.getsizeof(s) + sys.getsizeof(s.objects) for s in doc.sources.values()
+        )
+
+        graph = doc.relationship_graph
+        if graph is not None:
+            # Ordinals are shared by the adjacency lists, so they are only
+            # counted once in the ordinal map
+            def adjacency(edges):
+                return sys.getsizeof(edges) + estimate(
+                    edges.values(), sys.getsizeof, n, rng
+                )
+
+            size = (
+                sys.getsizeof(graph.ordinals)
+                + estimate(graph.ordinals.values(), sys.getsizeof, n, rng)
+                + sys.getsizeof(graph.nodes)
+            )
+            for edges in (graph.forward, graph.reverse):
+                size += sys.getsizeof(edges)
+                for e in edges.values():
+                    size += adjacency(e)
+            self.indexes["relationship_graph"] = size
+
+        for key, (index, _) in doc.text_indexes.items():
+
+            def folded_entry(item):
+                k, v = item
+                return sys.getsizeof(k) + sys.getsizeof(v)
+
+            size = (
+                sys.getsizeof(index.objects)
+                + estimate(index.objects.values(), sys.getsizeof, n, rng)
+                + sys.getsizeof(index.folded)
+                + estimate(index.folded.items(), folded_entry, n, rng)
+                + sys.getsizeof(index.ngrams)
+                + estimate(index.ngrams.items(), folded_entry, n, rng)
+                + sys.getsizeof(index.sorted_folded)
+            )
+            self.indexes["text_index " + ":".join(key)] = size
+
+        if doc.cache is not None:
+            self.indexes["cache"] = sys.getsizeof(doc.cache.entries) + doc.cache.size
+
+    def total(self):
+        return sum(self.by_type.values()) + sum(self.indexes.values())
@@ -0,0 +1,355 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import sys
+
+from .jsonld import encode_object
+from . import spdx3
+
+FORMATS = ("text", "json", "jsonl", "csv")
+
+# Arguments added by add_output_args(). These only change how results are
+# displayed, not what the results are
+OUTPUT_ARGS = ("format", "limit", "offset", "sort")
+OBJECT_FIELDS = ("handle", "type", "id", "name")
+
+# Output is collected and written in blocks of at least this many characters,
+# instead of writing each fragment separately
+BUFFER_SIZE = 64 * 1024
+
+
+def get_name(obj):
+    if "name" in obj._IRI:
+        return obj.name
+    return None
+
+
+SORT_KEYS = {
+    "id": None,
+    "handle": lambda o: o._metadata.get("handle", ""),
+    "name": lambda o: (get_name(o) or "", o),
+    "type": lambda o: (o.COMPACT_TYPE or o.TYPE, o),
+}
+
+# Sort keys for the (record, text) items returned by get_items(), for when the
+# objects themselves are not available
+ITEM_SORT_KEYS = {
+    "id": lambda i: (i[0]["id"] or "", i[0]["type"], i[0]["name"] or ""),
+    "handle": lambda i: i[0]["handle"] or "",
+    "name": lambda i: (i[0]["name"] or "", i[0]["id"] or ""),
+    "type": lambda i: (i[0]["type"], i[0]["id"] or ""),
+}
+
+
+def non_negative_int(s):
+    v = int(s)
+    if v < 0:
+        raise argparse.ArgumentTypeError(f"{s} is not a non-negative integer")
+    return v
+
+
+def add_output_args(parser, *, select=True):
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        help="Output format. Default is %(default)s",
+    )
+    if not select:
+        return
+
+    parser.add_argument(
+        "--limit",
+        metavar="N",
+        type=non_negative_int,
+        help="Stop after N results",
+    )
+    parser.add_argument(
+        "--offset",
+        metavar="N",
+        type=non_negative_int,
+        default=0,
+        help="Skip the first N results",
+    )
+    parser.add_argument(
+        "--sort",
+        nargs="?",
+        choices=sorted(SORT_KEYS.keys()),
+        const="id",
+        help="Sort results by KEY. Default is 'id' if no key is given. Results are unsorted if not specified",
+    )
+
+
+# Applies --sort, --offset and --limit to an iterable of objects. Unless
+# sorting is requested, objects are pulled from the iterable only as they are
+# needed, so evaluation stops as soon as enough results have been produced
+def select_objects(args, objects, sort_keys=SORT_KEYS):
+    start = args.offset
+    stop = None if args.limit is None else args.offset + args.limit
+
+    if args.sort:
+        key = sort_keys[args.sort]
+        if stop is not None:
+            objects = heapq.nsmallest(stop, objects, key=key)
+        else:
+            objects = sorted(objects, key=key)
+
+    return itertools.islice(objects, start, stop)
+
+
+def get_record(obj, full=False):
+    record = {
+        "handle": obj._metadata.get("handle"),
+        "type": obj.COMPACT_TYPE or obj.TYPE,
+        "id": obj._id or None,
+        "name": get_name(obj),
+    }
+    if full:
+        record["object"] = encode_object(obj)
+    return record
+
+
+def get_value(value, full=True):
+    if isinstance(value, spdx3.SHACLObject):
+        return get_record(value, full)
+    if isinstance(value, (list, spdx3.ListProxy)):
+        return [get_value(v, full) for v in value]
+    return value
+
+
+def format_object(obj, full=True, *, elide=True, _prefix=""):
+    def format_obj(o, prefix):
+        s = f"{prefix}{o.COMPACT_TYPE or o.TYPE} "
+        if type_handle := o._metadata.get("type_handle", None):
+            s += f"({type_handle}) "
+        yield s + f"- '{o._metadata['handle']}'\n"
+
+    def format_value(val, depth, prefix):
+        if isinstance(val, spdx3.SHACLObject):
+            if not val._id:
+                yield from format_object_props(val, depth + 1, prefix)
+            else:
+                yield from format_obj(val, prefix)
+        elif isinstance(val, spdx3.ListProxy):
+            if len(val) == 0:
+                if not elide:
+                    yield f"{prefix}[]\n"
+            elif len(val) == 1:
+                yield from format_value(val[0], depth, prefix)
+            else:
+                yield f"{prefix}[\n"
+                for idx, v in enumerate(val):
+                    yield from format_value(
+                        v, depth + 1, "  " * (depth + 2) + f"[{idx}]: "
+                    )
+                yield "  " * (depth + 1) + "]\n"
+        elif val is None:
+            if not elide:
+                yield f"{prefix}\n"
+        elif isinstance(val, str):
+            yield f"{prefix}{val!r}\n"
+        else:
+            yield f"{prefix}{val}\n"
+
+    def format_object_props(o, depth, prefix):
+        yield from format_obj(o, prefix)
+        for _, iri, compact in o.property_keys():
+            yield from format_value(
+                o[iri], depth, "  " * (depth + 1) + (compact or iri) + ": "
+            )
+
+    if isinstance(obj, (list, spdx3.ListProxy)):
+        for idx, o in enumerate(obj):
+            yield from format_object(o, full, elide=elide, _prefix=f"[{idx}]: ")
+        return
+
+    if not isinstance(obj, spdx3.SHACLObject):
+        yield f"{obj!r}\n"
+        return
+
+    if full:
+        yield "\n"
+        yield from format_object_props(obj, 0, _prefix)
+    else:
+        yield from format_obj(obj, _prefix)
+
+
+class OutputWriter(object):
+    def __init__(self, f=None, buffer_size=BUFFER_SIZE, **kwargs):
+        self.f = f if f is not None else sys.stdout
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffered = 0
+        self.count = 0
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, typ, value, tb):
+        if typ is None:
+            self.end()
+        self.flush()
+
+    def write(self, s):
+        self.buffer.append(s)
+        self.buffered += len(s)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.f.write("".join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+        self.f.flush()
+
+    def begin(self):
+        pass
+
+    def end(self):
+        pass
+
+    def write_object(self, obj, full=False, *, elide=True):
+        self.count += 1
+        self.write_record(get_value(obj, full))
+
+    # Writes a record that has a different representation in text than in
+    # the structured formats
+    def write_item(self, record, text):
+        self.count += 1
+        self.write_record(record)
+
+    def write_record(self, record):
+        pass
+
+    def write_summary(self):
+        pass
+
+    def write_count(self, count):
+        self.write(json.dumps({"count": count}))
+        self.write("\n")
+
+
+class TextWriter(OutputWriter):
+    def write_object(self, obj, full=False, *, elide=True):
+        self.count += 1
+        for s in format_object(obj, full, elide=elide):
+            self.write(s)
+
+    def write_item(self, record, text):
+        self.count += 1
+        self.write(text)
+        self.write("\n")
+
+    def write_summary(self):
+        self.write(f"Found {self.count} object(s)\n")
+
+    def write_count(self, count):
+        self.write(f"Found {count} object(s)\n")
+
+
+class JSONWriter(OutputWriter):
+    def begin(self):
+        self.write("[")
+
+    def end(self):
+        self.write("\n]\n" if self.count else "]\n")
+
+    def write_record(self, record):
+        self.write("\n" if self.count == 1 else ",\n")
+        self.write(json.dumps(record, default=str))
+
+
+class JSONLWriter(OutputWriter):
+    def write_record(self, record):
+        self.write(json.dumps(record, default=str))
+        self.write("\n")
+
+
+class CSVWriter(OutputWriter):
+    def __init__(self, fields=OBJECT_FIELDS, **kwargs):
+        super().__init__(**kwargs)
+        self.fields = fields
+        self.csv = csv.writer(self, lineterminator="\n")
+
+    def write_row(self, row):
+        self.csv.writerow(row)
+
+    def write_record(self, record):
+        if isinstance(record, list):
+            for r in record:
+                self.write_record(r)
+            return
+
+        if not isinstance(record, dict):
+            record = {"value": record}
+
+        row = []
+        for f in self.fields:
+            v = record.get(f)
+            if v is None:
+                v = ""
+            elif isinstance(v, list):
+                v = " ".join(str(i) for i in v)
+            row.append(v)
+        self.write_row(row)
+
+    def begin(self):
+        self.write_row(self.fields)
+
+    def write_count(self, count):
+        self.write_row(("count",))
+        self.write_row((count,))
+
+
+WRITERS = {
+    "text": TextWriter,
+    "json": JSONWriter,
+    "jsonl": JSONLWriter,
+    "csv": CSVWriter,
+}
+
+
+def get_writer(args, **kwargs):
+    return WRITERS[args.format](**kwargs)
+
+
+def write_objects(args, objects, full=False, **kwargs):
+    with get_writer(args, **kwargs) as w:
+        for o in select_objects(args, objects):
+            w.write_object(o, full)
+        w.write_summary()
+    return w.count
+
+
+# Returns a (record, text) item for each object, so that the objects can be
+# written by a different process than the one they were found in
+def get_items(args, objects, full=False):
+    for o in objects:
+        if args.format == "text":
+            yield get_record(o), "".join(format_object(o, full))[:-1]
+        else:
+            yield get_record(o, full), None
+
+
+def write_items(args, items):
+    with get_writer(args) as w:
+        for record, text in select_objects(args, items, ITEM_SORT_KEYS):
+            w.write_item(record, text)
+        w.write_summary()
+    return w.count
+
+
+def write_count(args, objects):
+    count = sum(1 for _ in select_objects(args, objects))
+    w = get_writer(args)
+    w.write_count(count)
+    w.flush()
+    return count
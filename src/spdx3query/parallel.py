@@ -0,0 +1,104 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import multiprocessing
+import re
+import threading
+
+# Columns smaller than this are not worth the overhead of starting workers
+MIN_PARALLEL_ROWS = 10000
+CHUNKS_PER_JOB = 4
+
+# The column being scanned. When workers are forked, they inherit this
+# snapshot from the parent process, so the column never needs to be pickled
+_column = None
+
+# The context and items passed to map_chunks(), which are also only inherited
+# by forked workers
+_chunk_args = None
+
+
+def _search_chunk(args):
+    pattern, flags, start, end, values = args
+    if values is None:
+        values = _column[start:end]
+
+    regex = re.compile(pattern, flags)
+    return [start + idx for idx, v in enumerate(values) if regex.search(v)]
+
+
+def _map_chunk(args):
+    func, start, end = args
+    context, items = _chunk_args
+    return func(context, items[start:end])
+
+
+# Returns the multiprocessing context for workers, and whether the workers
+# share the memory of this process. Forking while other threads are running
+# (e.g. the --watch thread in interactive mode) can deadlock the workers on a
+# lock held by another thread, so workers are only forked from a single
+# threaded process
+def get_context():
+    if threading.active_count() == 1:
+        try:
+            return multiprocessing.get_context("fork"), True
+        except ValueError:
+            pass
+
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver"), False
+    return multiprocessing.get_context("spawn"), False
+
+
+# Returns the ordinals of the values in the column that match the regex
+# pattern, using up to jobs worker processes
+def search_column(column, pattern, flags=0, jobs=1):
+    global _column
+
+    if jobs <= 1 or len(column) < MIN_PARALLEL_ROWS:
+        return _search_chunk((pattern, flags, 0, len(column), column))
+
+    ctx, shared = get_context()
+    chunk_size = -(-len(column) // (jobs * CHUNKS_PER_JOB))
+    chunks = []
+    for start in range(0, len(column), chunk_size):
+        end = min(start + chunk_size, len(column))
+        chunks.append(
+            (pattern, flags, start, end, None if shared else column[start:end])
+        )
+
+    _column = column
+    try:
+        with ctx.Pool(jobs) as pool:
+            result = []
+            for r in pool.imap(_search_chunk, chunks):
+                result.extend(r)
+            return result
+    finally:
+        _column = None
+
+
+# Calls func(context, chunk) for chunks of the items using up to jobs worker
+# processes, and returns the results in order. The context and items are never
+# pickled, so if workers cannot be forked, func is called once with all of the
+# items in this process instead
+def map_chunks(func, context, items, jobs=1):
+    global _chunk_args
+
+    ctx, shared = get_context()
+    if jobs <= 1 or not shared or len(items) < MIN_PARALLEL_ROWS:
+        return [func(context, items)]
+
+    chunk_size = -(-len(items) // (jobs * CHUNKS_PER_JOB))
+    chunks = [
+        (func, start, min(start + chunk_size, len(items)))
+        for start in range(0, len(items), chunk_size)
+    ]
+
+    _chunk_args = (context, items)
+    try:
+        with ctx.Pool(jobs) as pool:
+            return pool.map(_map_chunk, chunks)
+    finally:
+        _chunk_args = None
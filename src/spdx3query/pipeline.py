@@ -0,0 +1,204 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import contextlib
+import hashlib
+import json
+import queue
+import sys
+import threading
+import time
+
+from .progress import READ_SIZE
+
+# The number of blocks that the reader can read ahead of the decoder. This
+# bounds the memory used by blocks that have been read but not decoded
+MAX_BLOCKS = 16
+
+# The number of files that can be decoded ahead of the indexer. Decoded files
+# are much larger than the file itself, so the decoder waits for the indexer to
+# take a decoded file before it parses the next one. This means that at most
+# MAX_DECODED + 1 decoded files (including the one being indexed) are in memory
+MAX_DECODED = 1
+
+# Sent on a queue after the blocks of a file, and at the end of the inputs
+END = object()
+
+
+class Stopped(Exception):
+    pass
+
+
+# Accumulates the time a stage spends working, as opposed to waiting for its
+# input or for space in its output queue
+class Stage(object):
+    def __init__(self, name):
+        self.name = name
+        self.busy = 0.0
+        self.items = 0
+
+    @contextlib.contextmanager
+    def running(self):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.busy += time.monotonic() - start
+
+
+class LoadedFile(object):
+    def __init__(self, path, st, digest, read_time):
+        self.path = path
+        self.st = st
+        self.digest = digest
+        self.read_time = read_time
+        self.data = None
+
+
+# Loads files in three stages that run at the same time: a reader thread that
+# reads blocks of each file ahead and hashes them, a decoder thread that parses
+# the JSON, and the indexing of objects (which modifies the Document, so it is
+# done by the caller on the main thread). The stages are connected by bounded
+# queues, so a stage that gets ahead of the next one blocks until there is
+# space
+class LoadPipeline(object):
+    def __init__(self, paths, block_size=READ_SIZE, max_blocks=MAX_BLOCKS):
+        self.paths = [p.resolve() for p in paths]
+        self.block_size = block_size
+        self.blocks = queue.Queue(max_blocks)
+        self.decoded = queue.Queue(MAX_DECODED)
+        self.decode_slots = threading.BoundedSemaphore(MAX_DECODED)
+        self.stop = threading.Event()
+        self.read_stage = Stage("read")
+        self.decode_stage = Stage("decode")
+        self.index_stage = Stage("index")
+        self.start = None
+        self.elapsed = None
+
+    def put(self, q, item):
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise Stopped()
+
+    def get(self, q):
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise Stopped()
+
+    def acquire(self, sem):
+        while not self.stop.is_set():
+            if sem.acquire(timeout=0.1):
+                return
+        raise Stopped()
+
+    def read(self):
+        stage = self.read_stage
+        try:
+            for path in self.paths:
+                busy = stage.busy
+                with stage.running():
+                    st = path.stat()
+                    f = path.open("rb")
+                    h = hashlib.sha256()
+
+                with f:
+                    while True:
+                        with stage.running():
+                            block = f.read(self.block_size)
+                            h.update(block)
+                        if not block:
+                            break
+                        self.put(self.blocks, block)
+
+                stage.items += 1
+                self.put(
+                    self.blocks,
+                    LoadedFile(path, st, h.hexdigest(), stage.busy - busy),
+                )
+            self.put(self.blocks, END)
+        except Stopped:
+            pass
+        except Exception as e:
+            self.put_error(self.blocks, e)
+
+    def decode(self):
+        try:
+            blocks = []
+            while True:
+                item = self.get(self.blocks)
+                if item is END or isinstance(item, BaseException):
+                    self.put(self.decoded, item)
+                    return
+
+                if isinstance(item, LoadedFile):
+                    self.acquire(self.decode_slots)
+                    with self.decode_stage.running():
+                        item.data = json.loads(b"".join(blocks))
+                        blocks = []
+                    self.decode_stage.items += 1
+                    self.put(self.decoded, item)
+                else:
+                    blocks.append(item)
+        except Stopped:
+            pass
+        except Exception as e:
+            self.put_error(self.decoded, e)
+
+    def put_error(self, q, e):
+        try:
+            self.put(q, e)
+        except Stopped:
+            pass
+
+    # Calls index() with a LoadedFile for each of the paths, in order, on the
+    # calling thread
+    def run(self, index):
+        self.start = time.monotonic()
+        threads = [
+            threading.Thread(target=self.read, daemon=True),
+            threading.Thread(target=self.decode, daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            while True:
+                item = self.get(self.decoded)
+                if item is END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                # The decoder can start parsing the next file
+                self.decode_slots.release()
+                with self.index_stage.running():
+                    index(item)
+                    item.data = None
+                self.index_stage.items += 1
+        finally:
+            self.stop.set()
+            for t in threads:
+                t.join()
+            self.elapsed = time.monotonic() - self.start
+
+    def stages(self):
+        return (self.read_stage, self.decode_stage, self.index_stage)
+
+    def print_stats(self):
+        elapsed = max(self.elapsed, 1e-6)
+        print(
+            f"Pipeline: {self.elapsed:.2f}s, "
+            + ", ".join(
+                f"{s.name} {s.busy:.2f}s ({s.busy / elapsed:.0%})"
+                for s in self.stages()
+            ),
+            file=sys.stderr,
+        )
@@ -0,0 +1,91 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import sys
+import time
+
+READ_SIZE = 4 * 1024 * 1024
+
+# The time is only checked after this many objects (which must be a power of
+# two) are indexed, so that counting objects is nearly free
+OBJECT_BATCH = 4096
+
+
+def format_bytes(n):
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+# Shows the progress of loading a file on a single line that is rewritten
+# at most once per interval
+class LoadProgress(object):
+    def __init__(self, f=None, interval=0.25):
+        self.f = f if f is not None else sys.stderr
+        self.interval = interval
+        self.name = None
+
+    def begin(self, name, size):
+        self.name = name
+        self.size = size
+        self.bytes = 0
+        self.objects = 0
+        self.start = time.monotonic()
+        self.last = self.start
+        self.read_time = None
+        self.index_start = None
+
+    # Reads the complete file into a buffer while counting the bytes that
+    # have been read
+    def read(self, f):
+        buf = bytearray(self.size)
+        view = memoryview(buf)
+        while self.bytes < self.size:
+            n = f.readinto(view[self.bytes : self.bytes + READ_SIZE])
+            if not n:
+                break
+            self.bytes += n
+            self.update()
+        view.release()
+
+        del buf[self.bytes :]
+        buf += f.read()
+        self.read_time = max(time.monotonic() - self.start, 1e-6)
+        return buf
+
+    # Called instead of read() when the file was read by another thread
+    def prefetched(self, read_time):
+        self.bytes = self.size
+        self.read_time = max(read_time, 1e-6)
+
+    # Called when the file has been decoded and objects start to be indexed
+    def decoded(self):
+        self.index_start = time.monotonic()
+
+    def add_object(self):
+        self.objects += 1
+        if not self.objects & (OBJECT_BATCH - 1):
+            self.update()
+
+    def update(self):
+        now = time.monotonic()
+        if now - self.last < self.interval:
+            return
+        self.last = now
+
+        if self.index_start is None:
+            elapsed = now - self.start
+            status = f"{format_bytes(self.bytes)} of {format_bytes(self.size)} ({format_bytes(self.bytes / elapsed)}/s)"
+        else:
+            elapsed = max(now - self.index_start, 1e-6)
+            status = f"{format_bytes(self.bytes)} ({format_bytes(self.bytes / self.read_time)}/s), {self.objects} objects ({self.objects / elapsed:.0f}/s)"
+
+        self.f.write(f"\r\033[KLoading {self.name}: {status}")
+        self.f.flush()
+
+    def end(self):
+        self.f.write("\r\033[K")
+        self.f.flush()
@@ -0,0 +1,122 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+from pathlib import Path
+
+from .fingerprint import fingerprint_object
+from .jsonld import is_named
+
+MANIFEST_VERSION = 2
+
+
+# Returns the shard that owns the object with the given ID. This must not use
+# hash(), since it needs to give the same result in every process
+def get_shard(_id, count):
+    h = hashlib.sha256(_id.encode("utf-8")).digest()
+    return int.from_bytes(h[:8], "big") % count
+
+
+# Returns the shard that owns each blank node contained in the objects, where
+# get_owner returns the shard of an object. A blank node is owned by the
+# lowest shard of the objects that contain it, so that a blank node shared by
+# objects in different shards (e.g. a CreationInfo) only has one owner
+def get_blank_owners(objects, get_owner):
+    owners = {}
+    stack = []
+    for o in objects:
+        owner = get_owner(o)
+        if not is_named(o):
+            owners[o] = min(owner, owners.get(o, owner))
+        stack.append((o, owner))
+
+    while stack:
+        o, owner = stack.pop()
+        for c in o.iter_objects():
+            if is_named(c) or owners.get(c, owner + 1) <= owner:
+                continue
+            owners[c] = owner
+            stack.append((c, owner))
+
+    return owners
+
+
+# Counts the blank nodes written to a shard with the objects that are owned by
+# other shards. Blank nodes have no ID, so they are counted by a fingerprint of
+# their content
+def get_foreign_blank_nodes(objects, shard, blank_owners, memo):
+    foreign = {}
+    visited = set()
+    stack = list(objects)
+    while stack:
+        o = stack.pop()
+        for c in o.iter_objects():
+            if is_named(c) or c in visited:
+                continue
+            visited.add(c)
+            stack.append(c)
+
+    visited |= set(o for o in objects if not is_named(o))
+    for o in visited:
+        if blank_owners.get(o, 0) != shard:
+            fp = fingerprint_object(o, memo=memo)
+            foreign[fp] = foreign.get(fp, 0) + 1
+
+    return foreign
+
+
+# Returns the objects in a shard that are owned by it. Named objects are owned
+# by the shard selected by the hash of their ID. Blank nodes are owned by the
+# shard, except for the number of blank nodes with each fingerprint in
+# foreign, which are owned by other shards. Blank nodes with the same
+# fingerprint are identical, so it does not matter which of them are skipped
+def get_owned(doc, shard, count, foreign):
+    owned = set()
+    remaining = dict(foreign)
+    memo = {}
+    for o in doc.obj_by_handle.values():
+        if is_named(o):
+            if get_shard(o._id, count) == shard:
+                owned.add(o)
+            continue
+
+        if remaining:
+            fp = fingerprint_object(o, memo=memo)
+            if remaining.get(fp):
+                remaining[fp] -= 1
+                continue
+
+        owned.add(o)
+
+    return owned
+
+
+def write_manifest(path, files):
+    data = {
+        "version": MANIFEST_VERSION,
+        "count": len(files),
+        "files": files,
+    }
+    with path.open("w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+# Returns the paths of the shard files listed in a manifest in shard order,
+# with the fingerprints of the blank nodes in each that other shards own
+def read_manifest(path):
+    path = Path(path)
+    with path.open("r") as f:
+        data = json.load(f)
+
+    if data.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported shard manifest version {data.get('version')}")
+
+    files = data["files"]
+    if len(files) != data["count"]:
+        raise ValueError("Shard manifest is incomplete")
+
+    return [
+        ((path.parent / f["path"]).resolve(), f["foreign_blank_nodes"]) for f in files
+    ]
@@ -0,0 +1,243 @@
+# Copyright (c) 2024 Joshua Watt
+#
+# SPDX-License-Identifier: MIT
+
+import bisect
+import re
+
+from . import spdx3
+from .parallel import search_column
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+NGRAM_SIZE = 3
+
+# The parsed regex item for "^", which anchors a pattern to the start of a string
+AT_BEGINNING = (sre_constants.AT, sre_constants.AT_BEGINNING)
+
+
+# Folds the case of a string, such that characters that match each other with
+# re.IGNORECASE fold to the same text. Unlike lower(), casefold() folds
+# characters such as "ſ" and the Kelvin sign to "s" and "k", but it does not
+# fold the dotless "ı", which re.IGNORECASE also matches to "i"
+def fold_case(s):
+    return s.casefold().replace("\u0131", "i")
+
+
+def get_ngrams(s):
+    return set(s[i : i + NGRAM_SIZE] for i in range(len(s) - NGRAM_SIZE + 1))
+
+
+def property_values(prop):
+    def get_values(obj):
+        if prop not in obj._IRI:
+            return ()
+
+        v = getattr(obj, prop)
+        if isinstance(v, str):
+            return (v,)
+
+        if isinstance(v, spdx3.ListProxy):
+            return [i for i in v if isinstance(i, str)]
+
+        return ()
+
+    return get_values
+
+
+def external_id_values(type_iri):
+    def get_values(obj):
+        if "externalIdentifier" not in obj._IRI:
+            return ()
+
+        return [
+            v.identifier
+            for v in obj.externalIdentifier
+            if isinstance(v, spdx3.ExternalIdentifier)
+            and v.externalIdentifierType == type_iri
+        ]
+
+    return get_values
+
+
+# Extracts the literal strings that any string matching the regular
+# expression must contain. Returns a tuple of (prefix, literals, ignore_case),
+# where prefix is the literal the string must start with (if any)
+def get_regex_literals(pattern):
+    parsed = sre_parse.parse(pattern)
+    ignore_case = bool(parsed.state.flags & sre_constants.SRE_FLAG_IGNORECASE)
+    literals = []
+    prefix = None
+
+    def walk(items, top):
+        nonlocal ignore_case
+
+        current = []
+        start = 0
+
+        def flush():
+            nonlocal prefix
+            if current:
+                s = "".join(current)
+                literals.append(s)
+                if top and start == 1 and items[0] == AT_BEGINNING:
+                    prefix = s
+                current.clear()
+
+        for idx, (op, av) in enumerate(items):
+            if op is sre_constants.LITERAL:
+                if not current:
+                    start = idx
+                current.append(chr(av))
+                continue
+
+            flush()
+
+            if op is sre_constants.SUBPATTERN:
+                _, add_flags, _, p = av
+                if add_flags & sre_constants.SRE_FLAG_IGNORECASE:
+                    ignore_case = True
+                walk(p, False)
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+                if av[0] >= 1:
+                    walk(av[2], False)
+
+            # Anything else (alternation, character sets, wildcards, etc.)
+            # matches text that is not known in advance
+
+        flush()
+
+    walk(list(parsed), True)
+    return prefix, literals, ignore_case
+
+
+class TextIndex(object):
+    def __init__(self):
+        self.objects = {}
+        self.folded = {}
+        self.ngrams = {}
+        self.sorted_folded = []
+        self.sorted_dirty = False
+
+    def add(self, value, obj):
+        objs = self.objects.get(value)
+        if objs is None:
+            objs = self.objects[value] = set()
+            folded = fold_case(value)
+            values = self.folded.get(folded)
+            if values is None:
+                values = self.folded[folded] = set()
+                for g in get_ngrams(folded):
+                    self.ngrams.setdefault(g, set()).add(folded)
+                self.sorted_dirty = True
+            values.add(value)
+        objs.add(obj)
+
+    def remove(self, value, obj):
+        objs = self.objects.get(value)
+        if objs is None:
+            return
+
+        objs.discard(obj)
+        if objs:
+            return
+
+        del self.objects[value]
+        folded = fold_case(value)
+        values = self.folded[folded]
+        values.discard(value)
+        if values:
+            return
+
+        del self.folded[folded]
+        for g in get_ngrams(folded):
+            self.ngrams[g].discard(folded)
+            if not self.ngrams[g]:
+                del self.ngrams[g]
+        self.sorted_dirty = True
+
+    def get_objects(self, values):
+        result = set()
+        for v in values:
+            result |= self.objects[v]
+        return result
+
+    def get_values(self, folded_values):
+        values = set()
+        for f in folded_values:
+            values |= self.folded[f]
+        return values
+
+    def find(self, value, ignore_case=False):
+        if not ignore_case:
+            return set(self.objects.get(value, ()))
+
+        return self.get_objects(self.folded.get(fold_case(value), ()))
+
+    def find_prefix(self, prefix, ignore_case=False):
+        if self.sorted_dirty:
+            self.sorted_folded = sorted(self.folded.keys())
+            self.sorted_dirty = False
+
+        folded = fold_case(prefix)
+        start = bisect.bisect_left(self.sorted_folded, folded)
+        values = set()
+        for f in self.sorted_folded[start:]:
+            if not f.startswith(folded):
+                break
+            values |= self.folded[f]
+
+        if not ignore_case:
+            values = set(v for v in values if v.startswith(prefix))
+
+        return values
+
+    def candidates(self, pattern):
+        prefix, literals, _ = get_regex_literals(pattern)
+
+        folded = None
+        for lit in literals:
+            lit = fold_case(lit)
+            if len(lit) < NGRAM_SIZE:
+                continue
+
+            for g in get_ngrams(lit):
+                postings = self.ngrams.get(g, set())
+                if folded is None:
+                    folded = set(postings)
+                else:
+                    folded &= postings
+
+                if not folded:
+                    return set()
+
+            folded = set(f for f in folded if lit in f)
+
+        if folded is not None:
+            values = self.get_values(folded)
+            if prefix is not None:
+                folded_prefix = fold_case(prefix)
+                values = set(
+                    v for v in values if fold_case(v).startswith(folded_prefix)
+                )
+            return values
+
+        if prefix is not None:
+            return self.find_prefix(prefix, ignore_case=True)
+
+        return set(self.objects.keys())
+
+    def search(self, pattern, ignore_case=False, jobs=1):
+        flags = re.IGNORECASE if ignore_case else 0
+        re.compile(pattern, flags)
+
+        values = list(self.candidates(pattern))
+        result = set()
+        for idx in search_column(values, pattern, flags, jobs):
+            result |= self.objects[values[idx]]
+        return result
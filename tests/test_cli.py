@@ -2,8 +2,96 @@
 #
 # SPDX-License-Identifier: MIT
 
+import csv
+import io
+import json
+import multiprocessing
+import os
+import re
 import subprocess
 import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from spdx3query import catalog as catalog_module, parallel, spdx3
+from spdx3query.catalog import Catalog
+from spdx3query.columns import read_table
+from spdx3query.complete import Completer
+from spdx3query.main import Document, main as query_main
+from spdx3query.name import get_handle
+from spdx3query.pipeline import LoadPipeline
+from spdx3query.progress import LoadProgress
+
+
+def write_spdx(path, ns, packages, *, imports=[], depends=[]):
+    ci = spdx3.CreationInfo(
+        specVersion="3.0.1",
+        created=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+    person = spdx3.Person(_id=f"{ns}/person", name="Person", creationInfo=ci)
+    ci.createdBy = [person]
+
+    objs = [person]
+    pkgs = []
+    for name, version in packages:
+        p = spdx3.software_Package(
+            _id=f"{ns}/package/{name}",
+            creationInfo=ci,
+            name=name,
+            software_packageVersion=version,
+        )
+        pkgs.append(p)
+        objs.append(p)
+
+    for idx, to in enumerate(depends):
+        objs.append(
+            spdx3.Relationship(
+                _id=f"{ns}/relationship/{idx}",
+                creationInfo=ci,
+                from_=pkgs[0],
+                to=[to],
+                relationshipType=spdx3.RelationshipType.dependsOn,
+            )
+        )
+
+    doc = spdx3.SpdxDocument(
+        _id=f"{ns}/document",
+        creationInfo=ci,
+        element=list(objs),
+        rootElement=pkgs[:1],
+        import_=[spdx3.ExternalMap(externalSpdxId=i) for i in imports],
+    )
+    objs.append(doc)
+
+    with path.open("wb") as f:
+        spdx3.JSONLDSerializer().write(spdx3.SHACLObjectSet(objs), f)
+
+    return path
+
+
+def run(*args):
+    p = subprocess.run(
+        ["spdx3query"] + [str(a) for a in args],
+        check=True,
+        stdout=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    return p.stdout
+
+
+# Runs spdx3query and returns the output and the status messages
+def run_status(*args):
+    p = subprocess.run(
+        ["spdx3query"] + [str(a) for a in args],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    return p.stdout, p.stderr
 
 
 def test_help():
@@ -12,3 +100,802 @@ def test_help():
 
 def test_module():
     subprocess.run([sys.executable, "-m", "spdx3query", "--help"], check=True)
+
+
+def test_catalog(tmp_path):
+    catalog = tmp_path / "catalog"
+    catalog.mkdir()
+    write_spdx(catalog / "a.spdx.json", "http://a", [("a", "1.0")])
+    write_spdx(catalog / "b.spdx.json", "http://b", [("b", "1.0")])
+    main = write_spdx(
+        tmp_path / "main.spdx.json",
+        "http://main",
+        [("main", "1.0")],
+        imports=["http://a/package/a"],
+        depends=["http://a/package/a"],
+    )
+
+    out, status = run_status("-i", main, "--catalog", catalog, "info")
+    assert "from 1 catalog file(s)" in status
+    assert "Missing SPDX IDs: 0" in out
+    assert (catalog / ".spdx3query-catalog.json").is_file()
+
+    out = run(
+        "-i", main, "--catalog", catalog, "show", get_handle("http://b/package/b")
+    )
+    assert "'http://b/package/b'" in out
+
+
+def test_catalog_relationships(tmp_path, monkeypatch, capsys):
+    catalog = tmp_path / "catalog"
+    catalog.mkdir()
+    write_spdx(
+        catalog / "a.spdx.json",
+        "http://a",
+        [("a", "1.0")],
+        depends=["http://b/package/b"],
+    )
+    write_spdx(
+        catalog / "b.spdx.json",
+        "http://b",
+        [("b", "1.0")],
+        depends=["http://c/package/c"],
+    )
+    write_spdx(catalog / "c.spdx.json", "http://c", [("c", "1.0")])
+
+    # Packages that are reached through relationships are loaded from the
+    # catalog, and their relationships are followed
+    out = run(
+        "--catalog",
+        catalog,
+        "find",
+        "--from",
+        get_handle("http://a/package/a"),
+        "dependsOn",
+        "--transitive",
+    )
+    assert "Found 2 object(s)" in out
+    for _id in ("http://b/package/b", "http://c/package/c"):
+        assert "software_Package - '" + get_handle(_id) + "'" in out
+
+    out = run(
+        "--catalog",
+        catalog,
+        "find",
+        "--relationship",
+        get_handle("http://b/package/b"),
+        "dependsOn",
+        "-",
+        "--show",
+    )
+    assert "to: software_Package - '" + get_handle("http://c/package/c") in out
+
+    # Files that cannot be read are skipped
+    def index_file(path):
+        raise PermissionError(13, "Permission denied", str(path))
+
+    monkeypatch.setattr(catalog_module, "index_file", index_file)
+    (catalog / ".spdx3query-catalog.json").unlink()
+    c = Catalog(catalog)
+    c.update()
+    assert c.count() == 0
+    assert "Unable to index" in capsys.readouterr().err
+
+
+def test_dedup(tmp_path):
+    a = write_spdx(tmp_path / "a.spdx.json", "http://a", [("a", "1.0"), ("b", "1.0")])
+    b = write_spdx(tmp_path / "b.spdx.json", "http://a", [("a", "1.0"), ("b", "2.0")])
+
+    _, status = run_status("-i", a, "-i", b, "--dedup", "info")
+    assert f"{b}: 4 of 5 object(s) deduplicated, 1 conflict(s)" in status
+    assert f"http://a/package/b ({a} kept, {b} discarded)" in status
+
+
+def test_dedup_load(tmp_path):
+    a = write_spdx(tmp_path / "a.spdx.json", "http://a", [("a", "1.0")])
+    b = write_spdx(tmp_path / "b.spdx.json", "http://a", [("b", "1.0")])
+
+    # The CreationInfo in b is identical to the one in a, which was already
+    # linked when b is loaded
+    p = subprocess.run(
+        ["spdx3query", "-i", a, "--dedup", "interactive"],
+        input=f"load {b}\ninfo --show-missing\nfind --type CreationInfo --count\nquit\n",
+        check=True,
+        stdout=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    assert "Missing SPDX IDs: 0" in p.stdout
+    assert "Found 1 object(s)" in p.stdout
+
+
+def test_reload(tmp_path, capsys):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("a", "1.0"), ("b", "1.0")],
+        depends=["http://x/missing"],
+    )
+    main = write_spdx(
+        tmp_path / "main.spdx.json",
+        "http://main",
+        [("main", "1.0")],
+        depends=["http://a/package/a", "http://a/package/b", "http://a/package/c"],
+    )
+
+    doc = Document(3)
+    doc.load_file(a)
+    doc.load_file(main)
+    doc.link_unlinked()
+    rel_b = doc.find_by_id("http://main/relationship/1")
+    old_a = doc.find_by_id("http://a/package/a")
+    old_b = doc.find_by_id("http://a/package/b")
+    old_rel = doc.find_by_id("http://a/relationship/0")
+    assert doc.changed_files() == []
+    assert set(doc.referrers) == {"http://x/missing", "http://a/package/c"}
+    assert old_b._metadata["referenced_by"] == {
+        rel_b,
+        doc.find_by_id("http://a/document"),
+    }
+
+    def bump_mtime(path):
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+
+    # Touching a file without changing its content does not reload it
+    bump_mtime(a)
+    assert doc.changed_files() == []
+    assert doc.sources[a.resolve()].mtime == a.stat().st_mtime_ns
+
+    write_spdx(a, "http://a", [("a", "2.0"), ("c", "1.0")])
+    bump_mtime(a)
+    assert doc.changed_files() == [a.resolve()]
+
+    # The person, package a and the document are updated
+    assert doc.reload_file(a.resolve()) == (1, 2, 3)
+
+    for o in (old_b, old_rel):
+        assert o not in doc.obj_by_handle.values()
+        assert o not in doc.objects
+        assert doc.find_by_id(o._id) is None
+        for referrers in doc.referrers.values():
+            assert o not in referrers
+
+    # Package a is updated in place, so references to it remain valid
+    assert doc.find_by_id("http://a/package/a") is old_a
+    assert old_a.software_packageVersion == "2.0"
+    assert doc.find_by_id("http://main/relationship/0").to == [old_a]
+
+    # References to the removed package are reported as missing, and
+    # references to the new package are linked
+    assert rel_b.to == ["http://a/package/b"]
+    assert doc.referrers == {"http://a/package/b": {rel_b}}
+    assert doc.find_by_id("http://main/relationship/2").to == [
+        doc.find_by_id("http://a/package/c")
+    ]
+    assert doc.changed_files() == []
+
+    write_spdx(a, "http://a", [("a", "3.0")])
+    bump_mtime(a)
+    doc.reload()
+    err = capsys.readouterr().err
+    assert f"Reloaded {a.resolve()} in " in err
+    assert "0 added, 1 removed, 3 updated" in err
+    assert doc.find_by_id("http://main/relationship/2").to == ["http://a/package/c"]
+    assert doc.referrers.keys() == {"http://a/package/b", "http://a/package/c"}
+
+
+def test_watch(tmp_path):
+    a = write_spdx(tmp_path / "a.spdx.json", "http://a", [("a", "1.0")])
+
+    p = subprocess.Popen(
+        ["spdx3query", "-i", a, "interactive", "--watch", "--watch-interval", "0.1"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+    )
+    # Don't wait forever if the file is never reloaded
+    timer = threading.Timer(60, p.kill)
+    timer.start()
+    try:
+        assert p.stderr.readline().startswith("Loaded ")
+
+        # Replace the file atomically, so that it is never read while it is
+        # partially written
+        write_spdx(tmp_path / "new.spdx.json", "http://a", [("a", "2.0"), ("b", "1.0")])
+        os.replace(tmp_path / "new.spdx.json", a)
+        assert "1 added, 0 removed, 3 updated" in p.stderr.readline()
+
+        out, _ = p.communicate(
+            "find --property software_packageVersion 2.0 --count\nquit\n"
+        )
+    finally:
+        timer.cancel()
+
+    assert p.returncode == 0
+    assert "Found 1 object(s)" in out
+
+
+def test_incremental_link(tmp_path):
+    a = write_spdx(tmp_path / "a.spdx.json", "http://a", [("a", "1.0")])
+    main = write_spdx(
+        tmp_path / "main.spdx.json",
+        "http://main",
+        [("main", "1.0")],
+        depends=["http://a/package/a"],
+    )
+    rel = get_handle("http://main/relationship/0")
+
+    p = subprocess.run(
+        ["spdx3query", "-i", main, "interactive"],
+        input=f"info --show-missing\nload {a}\ninfo\nshow {rel}.to\nquit\n",
+        check=True,
+        stdout=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    assert "Missing SPDX IDs: 1\n  http://a/package/a" in p.stdout
+    assert "Missing SPDX IDs: 0" in p.stdout
+    assert "software_Package - '" + get_handle("http://a/package/a") in p.stdout
+
+
+def test_find_name(tmp_path):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("libfoo", "1.0"), ("LibBar", "2.0"), ("zlib", "2.0")],
+    )
+
+    out = run("-i", a, "find", "--name-pattern", "^lib", "--count")
+    assert "Found 1 object(s)" in out
+
+    out = run("-i", a, "find", "--name-pattern", "^lib", "-I", "--count")
+    assert "Found 2 object(s)" in out
+
+    out = run("-i", a, "find", "--name", "ZLIB", "-I")
+    assert get_handle("http://a/package/zlib") in out
+
+    # Candidates are found with the same case folding as the regex, e.g. the
+    # Kelvin sign matches "k", the long s matches "s" and the dotless i
+    # matches "I"
+    b = write_spdx(
+        tmp_path / "b.spdx.json",
+        "http://b",
+        [("\u212aelvin", "1.0"), ("cla\u017fs", "1.0"), ("\u0131dle", "1.0")],
+    )
+    for pattern in ("^kel", "class", "IDLE"):
+        out = run("-i", b, "find", "--name-pattern", pattern, "-I", "--count")
+        assert "Found 1 object(s)" in out
+
+    out = run(
+        "-i", a, "find", "--property", "software_packageVersion", "2.0", "--count"
+    )
+    assert "Found 2 object(s)" in out
+
+
+def test_find_inline(tmp_path):
+    ci = spdx3.CreationInfo(
+        specVersion="3.0.1",
+        created=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+    person = spdx3.Person(_id="http://a/person", name="Person", creationInfo=ci)
+    ci.createdBy = [person]
+    package = spdx3.software_Package(
+        _id="http://a/package/a",
+        creationInfo=ci,
+        name="a",
+        verifiedUsing=[
+            spdx3.Hash(algorithm=spdx3.HashAlgorithm.sha256, hashValue="abc123")
+        ],
+    )
+    rel = spdx3.Relationship(
+        _id="http://a/relationship/0",
+        creationInfo=ci,
+        from_=package,
+        to=["http://b/package/missing"],
+        relationshipType=spdx3.RelationshipType.dependsOn,
+    )
+    a = tmp_path / "a.spdx.json"
+    with a.open("wb") as f:
+        spdx3.JSONLDSerializer().write(spdx3.SHACLObjectSet([person, package, rel]), f)
+
+    # The Hash is inline in the package, so it is not a top level object
+    out = run("-i", a, "find", "--type", "Hash", "--show")
+    assert "hashValue" in out and "abc123" in out
+    assert "Found 1 object(s)" in out
+
+    out = run("-i", a, "find", "--verified-using", "sha256", "abc123")
+    assert get_handle("http://a/package/a") in out
+
+    # References to IDs that are not loaded are not objects
+    out = run("-i", a, "find", "--from", "-", "dependsOn", "--count")
+    assert "Found 0 object(s)" in out
+
+
+def test_find_jobs(tmp_path, monkeypatch, capsys):
+    names = [f"pkg{i}" for i in range(50)]
+    a = write_spdx(tmp_path / "a.spdx.json", "http://a", [(n, "1.0") for n in names])
+
+    # Scan even small columns in worker processes
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_ROWS", 0)
+
+    def find(jobs):
+        # The pattern has no literals, so every name is scanned
+        args = ["-i", str(a), "find", "--name-pattern", "1|3", "--sort", "name"]
+        assert query_main(args + ["--jobs", str(jobs)]) == 0
+        return capsys.readouterr().out.splitlines()
+
+    expected = find(1)
+    count = len([n for n in names if "1" in n or "3" in n])
+    assert expected[-1] == f"Found {count} object(s)"
+    assert find(2) == expected
+
+    # Workers are not forked while other threads are running
+    stop = threading.Event()
+    t = threading.Thread(target=stop.wait)
+    t.start()
+    try:
+        ctx, shared = parallel.get_context()
+    finally:
+        stop.set()
+        t.join()
+    assert not shared
+    assert ctx.get_start_method() != "fork"
+
+    # If workers cannot be forked, the values are passed to them instead
+    column = sorted(names)
+    expected = parallel.search_column(column, "1|3")
+    monkeypatch.setattr(
+        parallel, "get_context", lambda: (multiprocessing.get_context("spawn"), False)
+    )
+    assert parallel.search_column(column, "1|3", jobs=2) == expected
+
+
+def test_find_format(tmp_path):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("libfoo", "1.0"), ("libbar", "2.0"), ("zlib", "2.0")],
+    )
+
+    out = run(
+        "-i",
+        a,
+        "find",
+        "--type",
+        "software_Package",
+        "--sort",
+        "name",
+        "--format",
+        "jsonl",
+    )
+    records = [json.loads(line) for line in out.splitlines()]
+    assert [r["name"] for r in records] == ["libbar", "libfoo", "zlib"]
+
+    out = run(
+        "-i",
+        a,
+        "find",
+        "--type",
+        "software_Package",
+        "--sort",
+        "--offset",
+        "1",
+        "--limit",
+        "1",
+        "--show",
+        "--format",
+        "json",
+    )
+    records = json.loads(out)
+    assert len(records) == 1
+    assert records[0]["id"] == "http://a/package/libfoo"
+    assert records[0]["object"]["software_packageVersion"] == "1.0"
+
+    out = run("-i", a, "find", "--name", "zlib", "--format", "csv")
+    assert out.splitlines() == [
+        "handle,type,id,name",
+        f"{get_handle('http://a/package/zlib')},software_Package,http://a/package/zlib,zlib",
+    ]
+
+
+def test_extract(tmp_path):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("main", "1.0"), ("dep", "1.0"), ("other", "1.0")],
+        depends=["http://a/package/dep"],
+    )
+    out_path = tmp_path / "out.spdx.json"
+
+    out = run(
+        "-i",
+        a,
+        "extract",
+        "-o",
+        out_path,
+        "--relationships",
+        "--query",
+        "--name main",
+    )
+    assert "Extracted 4 object(s)" in out
+
+    objset = spdx3.SHACLObjectSet()
+    with out_path.open("rb") as f:
+        spdx3.JSONLDDeserializer().read(f, objset)
+
+    ids = set(o._id for o in objset.foreach() if o._id)
+    assert ids == {
+        "http://a/package/main",
+        "http://a/package/dep",
+        "http://a/relationship/0",
+        "http://a/person",
+    }
+
+    out = run("-i", out_path, "info")
+    assert "Missing SPDX IDs: 0" in out
+
+
+def test_diff(tmp_path):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("foo", "1.0"), ("bar", "1.0"), ("baz", "1.0")],
+    )
+    b = write_spdx(
+        tmp_path / "b.spdx.json",
+        "http://a",
+        [("foo", "1.1"), ("bar", "1.0"), ("new", "1.0")],
+    )
+
+    out = run("diff", a, b, "--type", "software_Package", "--format", "jsonl")
+    changes = set()
+    for line in out.splitlines():
+        r = json.loads(line)
+        changes.add((r["change"], r["name"], tuple(r.get("properties", []))))
+
+    assert changes == {
+        ("changed", "foo", ("software_packageVersion",)),
+        ("removed", "baz", ()),
+        ("added", "new", ()),
+    }
+
+    out = run("diff", a, b)
+    assert "1 added, 1 removed, 2 changed" in out
+
+
+def test_stats(tmp_path):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("foo", "1.0"), ("bar", "1.0"), ("baz", "2.0")],
+        depends=["http://a/package/bar", "http://a/package/baz"],
+    )
+
+    out = run(
+        "-i",
+        a,
+        "stats",
+        "--group",
+        "type",
+        "--group",
+        "relationship-type",
+        "--group-by",
+        "software_packageVersion",
+        "--format",
+        "jsonl",
+    )
+    stats = {}
+    for line in out.splitlines():
+        r = json.loads(line)
+        stats[(r["group"], r["value"])] = r["count"]
+
+    assert stats[("type", "software_Package")] == 3
+    assert stats[("relationship-type", "dependsOn")] == 2
+    assert stats[("software_packageVersion", "1.0")] == 2
+    assert stats[("software_packageVersion", "2.0")] == 1
+
+
+def test_find_transitive(tmp_path):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("a", "1.0")],
+        depends=["http://b/package/b"],
+    )
+    b = write_spdx(
+        tmp_path / "b.spdx.json",
+        "http://b",
+        [("b", "1.0")],
+        depends=["http://c/package/c"],
+    )
+    c = write_spdx(
+        tmp_path / "c.spdx.json",
+        "http://c",
+        [("c", "1.0")],
+        depends=["http://a/package/a"],
+    )
+    handle_a = get_handle("http://a/package/a")
+
+    def find(*args):
+        out = run("-i", a, "-i", b, "-i", c, "find", "--format", "jsonl", *args)
+        return set(json.loads(line)["name"] for line in out.splitlines())
+
+    assert find("--from", handle_a, "dependsOn") == {"b"}
+    assert find("--from", handle_a, "dependsOn", "--depth", "2") == {"b", "c"}
+
+    # The dependencies form a cycle, so the package depends on itself
+    assert find("--from", handle_a, "dependsOn", "--transitive") == {"a", "b", "c"}
+    assert find("--to", "dependsOn", handle_a, "--transitive") == {"a", "b", "c"}
+
+
+def test_cache(tmp_path):
+    a = write_spdx(tmp_path / "a.spdx.json", "http://a", [("a", "1.0")])
+    b = write_spdx(tmp_path / "b.spdx.json", "http://b", [("b", "1.0")])
+
+    p = subprocess.run(
+        ["spdx3query", "-i", a, "interactive"],
+        input="\n".join(
+            [
+                "find --type software_Package --count",
+                "find --type software_Package --format csv",
+                "cache stats",
+                f"load {b}",
+                "find --type software_Package --count",
+                "cache stats",
+                "quit",
+                "",
+            ]
+        ),
+        check=True,
+        stdout=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    assert "Hits:          1\nMisses:        1\n" in p.stdout
+    assert "Found 2 object(s)" in p.stdout
+    assert "Hits:          1\nMisses:        2\n" in p.stdout
+    assert "Invalidations: 1" in p.stdout
+
+
+def test_shard(tmp_path):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("foo", "1.0"), ("bar", "1.0"), ("baz", "2.0"), ("qux", "2.0")],
+        depends=["http://a/package/bar", "http://a/package/baz"],
+    )
+    shards = tmp_path / "shards"
+
+    out = run("-i", a, "shard", "-o", shards, "-n", 3)
+    assert "Wrote 3 shard(s)" in out
+    manifest = shards / "manifest.json"
+    assert manifest.is_file()
+
+    def query(*args, ordered=True):
+        direct = run("-i", a, *args).splitlines()
+        sharded = run("--shards", manifest, *args).splitlines()
+        if not ordered:
+            direct.sort()
+            sharded.sort()
+        assert direct == sharded
+        return sharded
+
+    query("find", "--type", "software_Package", "--sort", "--format", "jsonl")
+    query("find", "--subclass", "Element", "--count")
+    query("find", "--from", get_handle("http://a/package/foo"), "dependsOn", "--sort")
+    # Values with the same count may be in a different order
+    query(
+        "stats",
+        "--group",
+        "relationship-type",
+        "--group-by",
+        "name",
+        ordered=False,
+    )
+    assert "Found 2 object(s)" in query(
+        "find", "--property", "software_packageVersion", "2.0", "--sort", "name"
+    )
+
+    # The CreationInfo is shared by objects in every shard, but it is only
+    # owned by one of them
+    assert "Found 1 object(s)" in query("find", "--type", "CreationInfo", "--count")
+    query("stats", "--group", "type", ordered=False)
+
+    # Relationships cannot be followed across shards
+    p = subprocess.run(
+        ["spdx3query", "--shards", manifest, "find", "--from"]
+        + [get_handle("http://a/package/foo"), "dependsOn", "--transitive"],
+        stdout=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    assert p.returncode == 1
+    assert "Command does not support --shards" in p.stdout
+
+
+def test_check(tmp_path):
+    a = write_spdx(tmp_path / "a.spdx.json", "http://a", [("a", "1.0")])
+    main = write_spdx(
+        tmp_path / "main.spdx.json",
+        "http://main",
+        [("main", "1.0")],
+        imports=["http://b/package/b"],
+        depends=["http://a/package/a", "http://b/package/b", "http://c/package/c"],
+    )
+    dup = write_spdx(tmp_path / "dup.spdx.json", "http://a", [("a", "2.0")])
+
+    p = subprocess.run(
+        ["spdx3query", "-i", main, "-i", a, "-i", dup, "check", "--format", "jsonl"],
+        stdout=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    assert p.returncode == 1
+
+    problems = {}
+    for line in p.stdout.splitlines():
+        r = json.loads(line)
+        problems.setdefault(r["check"], []).append(r)
+
+    assert problems["missing-reference"] == [
+        {
+            "check": "missing-reference",
+            "id": "http://c/package/c",
+            "referrers": [get_handle("http://main/relationship/2")],
+        }
+    ]
+    assert set(r["id"] for r in problems["duplicate-id"]) == {
+        "http://a/person",
+        "http://a/package/a",
+        "http://a/document",
+    }
+    assert "handle-collision" not in problems
+
+    out = run("-i", main, "-i", a, "check", "--check", "duplicate-id")
+    assert "0 problem(s) found" in out
+
+
+def test_load_progress(tmp_path):
+    a = write_spdx(tmp_path / "a.spdx.json", "http://a", [("a", "1.0")])
+
+    # Progress is not shown when the output is not a terminal
+    out = run("-i", a, "info")
+    assert "Loading" not in out
+
+    f = io.StringIO()
+    doc = Document(3)
+    doc.progress = LoadProgress(f, interval=0)
+    doc.load_file(a)
+    assert f"\r\033[KLoading a.spdx.json: {a.stat().st_size}.0 B of" in f.getvalue()
+    assert f.getvalue().endswith("\r\033[K")
+    assert doc.progress.objects == len(doc.obj_by_handle)
+
+
+def test_complete(tmp_path):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("foo", "1.0"), ("bar", "1.0")],
+        depends=["http://a/package/bar"],
+    )
+    doc = Document(3)
+    doc.load_file(a)
+    doc.link_unlinked()
+
+    completer = Completer(doc, ["find", "show"], threading.Lock())
+    assert completer.get_matches("f", command=True) == ["find"]
+
+    foo = get_handle("http://a/package/foo")
+    assert foo in completer.get_matches(foo[:3])
+    assert completer.get_matches(foo) == [foo]
+    assert completer.get_matches("does-not-exist") == []
+
+    rel = get_handle("http://a/relationship/0")
+    assert completer.get_matches(f"{rel}.relationship") == [f"{rel}.relationshipType"]
+    assert f"{rel}.from_.name" in completer.get_matches(f"{rel}.from_.n")
+
+    # End of input exits interactive mode
+    p = subprocess.run(
+        ["spdx3query", "-i", a, "interactive"],
+        input="find --name foo\n",
+        stdout=subprocess.PIPE,
+        encoding="utf-8",
+        timeout=60,
+    )
+    assert p.returncode == 0
+    assert foo in p.stdout
+
+
+def test_export_columns(tmp_path):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("foo", "1.0"), ("bar", "2.0")],
+        depends=["http://a/package/bar", "http://b/package/missing"],
+    )
+
+    for fmt in ("csv", "columns"):
+        out_dir = tmp_path / fmt
+        out = run("-i", a, "export-columns", "-o", out_dir, "--format", fmt)
+        assert "Exported 7 object(s)" in out
+
+    def read_csv(name):
+        with (tmp_path / "csv" / f"{name}.csv").open() as f:
+            return list(csv.DictReader(f))
+
+    def read_columns(name):
+        table, columns = read_table(tmp_path / "columns" / f"{name}.cols")
+        assert table == name
+        return [
+            {k: "" if v is None else str(v) for k, v in zip(columns, row)}
+            for row in zip(*columns.values())
+        ]
+
+    for read in (read_csv, read_columns):
+        objects = {r["oid"]: r for r in read("objects")}
+        packages = {r["name"]: r for r in read("software_Package")}
+        assert packages["bar"]["software_packageVersion"] == "2.0"
+        assert objects[packages["foo"]["oid"]]["id"] == "http://a/package/foo"
+
+        deps = set()
+        for r in read("relationships"):
+            assert r["relationshipType"] == "dependsOn"
+            assert r["from"] == packages["foo"]["oid"]
+            deps.add(objects[r["to"]]["id"])
+        assert deps == {"http://a/package/bar", "http://b/package/missing"}
+
+
+def test_info_memory(tmp_path):
+    a = write_spdx(
+        tmp_path / "a.spdx.json",
+        "http://a",
+        [("foo", "1.0"), ("bar", "1.0")],
+        depends=["http://a/package/bar"],
+    )
+
+    out = run("-i", a, "info", "--memory", "--memory-sample", "3")
+    assert "Estimated memory (sampled 3 of 6 objects)" in out
+
+    lines = out.splitlines()
+    indexes = lines[lines.index("Indexes:") + 1 : lines.index("String sharing:")]
+    names = [line.split()[0] for line in indexes]
+    for name in ("obj_by_handle", "obj_by_type", "obj_by_id", "objects"):
+        assert name in names
+
+    assert re.search(r"obj_by_handle keys +100\.0% of 3 repeated", out)
+
+
+def test_load_pipeline(tmp_path):
+    a = write_spdx(tmp_path / "a.spdx.json", "http://a", [("foo", "1.0")])
+    b = write_spdx(
+        tmp_path / "b.spdx.json",
+        "http://b",
+        [("bar", "1.0")],
+        depends=["http://a/package/foo"],
+    )
+
+    expected = run("-i", a, "-i", b, "info")
+    out, status = run_status("-i", a, "-i", b, "--pipeline", "info")
+    assert re.search(r"^Pipeline: [0-9.]+s, read .*, decode .*, index ", status, re.M)
+    assert out == expected
+
+    # Small blocks and queues make each stage wait for the others
+    doc = Document(3)
+    pipeline = LoadPipeline([a, b, a], block_size=64, max_blocks=1)
+    loaded = []
+    pipeline.run(lambda f: loaded.append((f.path, f.data)))
+    assert loaded == [(p, json.loads(p.read_text())) for p in (a, b, a)]
+    assert [s.items for s in pipeline.stages()] == [3, 3, 3]
+
+    # A slow indexer does not let the decoder parse more than one file ahead
+    pipeline = LoadPipeline([a, b, a, b])
+    ahead = []
+
+    def index(f):
+        time.sleep(0.1)
+        ahead.append(pipeline.decode_stage.items - pipeline.index_stage.items)
+
+    pipeline.run(index)
+    assert max(ahead) == 2
+
+    with pytest.raises(FileNotFoundError):
+        LoadPipeline([a, tmp_path / "missing.json"]).run(doc.load_prefetched)
+    assert list(doc.sources) == [a.resolve()]